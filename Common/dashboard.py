@@ -1,5 +1,5 @@
 import streamlit as st 
-import utils, restncache
+import utils, restncache, fleet
 import pandas as pd
 import jsonify
 import requests
@@ -332,6 +332,57 @@ def cdc_page_dashboard():
 
     st.session_state.cdc_status = "Steady"
 
+def cdc_fleet_dashboard():
+    utils.page_header_title('CDC Fleet')
+
+    # The tracked endpoints belong to the process-wide manager, shared by
+    # every session, so they only change on an explicit "Apply"; a rerun
+    # of another session's page must not replace them.
+    manager = fleet.get_fleet_manager()
+    default = st.session_state.get('server')
+    if default and not manager.endpoints():
+        manager.add(default)
+
+    endpoints = st.text_area("CDC endpoints (one IP per line, shared by all users)",
+                             value="\n".join(manager.endpoints()))
+    c1, c2 = st.columns(2)
+    with c1:
+        if st.button("Apply endpoints"):
+            manager.set_endpoints(endpoints.splitlines())
+    with c2:
+        if st.button("Refresh now"):
+            manager.refresh()
+
+    # Everything below comes from the background caches; nothing here waits
+    # on a controller, so one slow CDC does not hold up the page.
+    view = manager.merged_view()
+
+    colored_header(label="Controllers", description="Background refresh status per CDC", color_name="blue-70")
+    st.dataframe(pd.DataFrame(view["status"]), use_container_width=True)
+
+    # Zone and alias counts come from each CDC's summary; the per-object
+    # listings are not served by real controllers.
+    def total(key):
+        return sum(int(info.get(key) or 0) for info in view["summary"].values() if isinstance(info, dict))
+
+    m1, m2, m3, m4, m5 = st.columns(5)
+    m1.metric("Controllers", len(view["status"]))
+    m2.metric("Entities", len(view["entities"]))
+    m3.metric("Interfaces", len(view["interfaces"]))
+    m4.metric("Zones", total("No of Zones"))
+    m5.metric("Aliases", total("No of Aliases"))
+
+    tab1, tab2, tab3 = st.tabs(["|**Entities**", "|**Interfaces**", "|**CDC Summary**"])
+    with tab1:
+        rows = [{"cdc": e["cdc"], "name": e.get("name"), "entity_type": e.get("entity_type"),
+                 "entity_id": e.get("entity_id"), "portal_count": e.get("portal_count")}
+                for e in view["entities"]]
+        st.dataframe(pd.DataFrame(rows), use_container_width=True)
+    with tab2:
+        st.dataframe(pd.DataFrame(view["interfaces"]), use_container_width=True)
+    with tab3:
+        st.dataframe(pd.DataFrame.from_dict(view["summary"], orient="index"), use_container_width=True)
+
 if __name__ == "__main__":
     # Streamlit UI components
     st.title("Registered NVMe Nodes")
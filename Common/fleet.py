@@ -0,0 +1,168 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+import restcall
+import restcall_async
+
+# Default seconds between background refreshes of one controller.
+REFRESH_INTERVAL = float(os.environ.get("CDC_FLEET_INTERVAL", "30"))
+# A controller whose last good refresh is older than this many intervals
+# is shown as stale.
+STALE_AFTER = 3
+
+
+class Controller:
+    """Cached inventory of one CDC endpoint and its refresh state."""
+
+    def __init__(self, ip, interval):
+        self.ip = ip
+        self.interval = interval
+        self.inventory = {}         # command -> last good response
+        self.errors = {}            # command -> message from the last refresh
+        self.commands = 0           # commands asked for in the last refresh
+        self.last_refresh = None    # time of the last refresh where any command succeeded
+        self.last_attempt = None
+        self.refresh_seconds = None
+        self.wake = threading.Event()
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+
+    def update(self, responses, seconds):
+        with self.lock:
+            self.errors = {}
+            for command, response in responses.items():
+                if isinstance(response, dict) and "error" not in response:
+                    self.inventory[command] = response
+                else:
+                    self.errors[command] = response.get("error") if isinstance(response, dict) else str(response)
+            self.commands = len(responses)
+            self.last_attempt = time.time()
+            self.refresh_seconds = seconds
+            if len(self.errors) < len(responses):
+                self.last_refresh = self.last_attempt
+
+    def status(self):
+        with self.lock:
+            age = time.time() - self.last_refresh if self.last_refresh else None
+            if self.last_attempt is None:
+                state = "pending"
+            elif age is None or len(self.errors) == self.commands:
+                state = "unreachable"
+            elif self.errors:
+                # Some commands answered: partial data, not a dead controller.
+                state = "degraded"
+            elif age > self.interval * STALE_AFTER:
+                state = "stale"
+            else:
+                state = "ok"
+            return {
+                "cdc": self.ip,
+                "state": state,
+                "age_seconds": round(age, 1) if age is not None else None,
+                "refresh_seconds": round(self.refresh_seconds, 3) if self.refresh_seconds is not None else None,
+                "interval": self.interval,
+                "commands_ok": f"{self.commands - len(self.errors)}/{self.commands}" if self.commands else None,
+                "errors": "; ".join(f"{c}: {e}" for c, e in self.errors.items()),
+            }
+
+
+class FleetManager:
+    """Keeps a cached inventory for every tracked CDC endpoint.
+
+    Each controller has its own daemon thread that refreshes it every
+    `interval` seconds, issuing all of its commands at once on a small
+    pool of its own. A slow or hung controller therefore only ties up its
+    own threads and delays its own data; it cannot starve the others (or
+    the shared restcall_async pool). Readers never wait on the network:
+    merged_view() combines whatever each controller last returned
+    successfully.
+    """
+
+    def __init__(self, interval=REFRESH_INTERVAL, commands=restcall_async.INVENTORY_COMMANDS):
+        self.interval = interval
+        self.commands = commands
+        self._controllers = {}
+        self._lock = threading.Lock()
+
+    def add(self, ip, interval=None):
+        with self._lock:
+            if ip in self._controllers:
+                return self._controllers[ip]
+            controller = self._controllers[ip] = Controller(ip, interval or self.interval)
+        threading.Thread(target=self._run, args=(controller,), daemon=True,
+                         name=f"cdc-fleet-{ip}").start()
+        return controller
+
+    def remove(self, ip):
+        with self._lock:
+            controller = self._controllers.pop(ip, None)
+        if controller is not None:
+            controller.stop.set()
+            controller.wake.set()
+
+    def set_endpoints(self, ips):
+        """Track exactly `ips`: start new controllers, stop dropped ones."""
+        wanted = list(dict.fromkeys(ip.strip() for ip in ips if ip.strip()))
+        for ip in set(self.endpoints()) - set(wanted):
+            self.remove(ip)
+        for ip in wanted:
+            self.add(ip)
+
+    def endpoints(self):
+        with self._lock:
+            return list(self._controllers)
+
+    def refresh(self, ip=None):
+        """Ask one controller (or all) to refresh now instead of at the next interval."""
+        with self._lock:
+            controllers = list(self._controllers.values()) if ip is None else [self._controllers.get(ip)]
+        for controller in controllers:
+            if controller is not None:
+                controller.wake.set()
+
+    def _run(self, controller):
+        # Spread the first refreshes so a large fleet does not poll in lockstep.
+        controller.wake.wait(random.uniform(0, min(controller.interval, 2.0)))
+        with ThreadPoolExecutor(max_workers=len(self.commands),
+                                thread_name_prefix=f"cdc-fleet-{controller.ip}") as pool:
+            while not controller.stop.is_set():
+                controller.wake.clear()
+                started = time.monotonic()
+                futures = {command: pool.submit(restcall.send_get_command, controller.ip, command)
+                           for command in self.commands}
+                responses = {}
+                for command, future in futures.items():
+                    try:
+                        responses[command] = future.result()
+                    except Exception as e:
+                        responses[command] = {"error": str(e)}
+                controller.update(responses, time.monotonic() - started)
+                controller.wake.wait(controller.interval)
+
+    def status(self):
+        with self._lock:
+            controllers = list(self._controllers.values())
+        return [c.status() for c in controllers]
+
+    def merged_view(self):
+        """Fleet-wide summary/entities/interfaces from the cached inventories."""
+        with self._lock:
+            controllers = list(self._controllers.values())
+        inventory = {}
+        for controller in controllers:
+            with controller.lock:
+                inventory[controller.ip] = dict(controller.inventory)
+        merged = restcall_async.merge_inventory(inventory)
+        merged["status"] = [c.status() for c in controllers]
+        return merged
+
+
+@st.cache_resource(show_spinner=False)
+def get_fleet_manager():
+    """The process-wide FleetManager, shared by all Streamlit sessions."""
+    return FleetManager()
@@ -50,6 +50,10 @@ def disp_sidebar_navigation():
         print("Setting Page to 4")
         set_page(4)
         st.rerun()
+    if st.sidebar.button("Fleet View", key="nav_5"):
+        print("Setting Page to 5")
+        set_page(5)
+        st.rerun()
 
 def render_page_content():
     """Render the main page content based on current page"""
@@ -80,6 +84,9 @@ def render_page_content():
             print("CDC Zone view, Page 4")
             dispzones.fetch_zonecfg_and_render()
             #st.write("CDC Zone view, Page 4")
+        elif st.session_state.page == 5:
+            print("CDC Fleet view, Page 5")
+            dashboard.cdc_fleet_dashboard()
 
 def handle_auto_login():
     """Handle automatic login with predefined credentials"""
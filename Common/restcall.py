@@ -1,14 +1,94 @@
 import streamlit as st
 import requests
 import json
+import os
+import threading
+from collections import OrderedDict
+from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.exceptions import InsecureRequestWarning # type: ignore
 
 requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 
+# One keep-alive session per CDC host, shared by every helper (and every
+# Streamlit session in the process), so repeated calls reuse TCP/TLS
+# connections instead of handshaking each time.
+CONNECT_TIMEOUT = float(os.environ.get("CDC_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.environ.get("CDC_READ_TIMEOUT", "30"))
+POOL_SIZE = int(os.environ.get("CDC_POOL_SIZE", "10"))
+TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+def get_session(cdc_server_ip):
+    """Return the pooled session for `cdc_server_ip`."""
+    with _sessions_lock:
+        session = _sessions.get(cdc_server_ip)
+        if session is None:
+            session = requests.Session()
+            session.verify = False
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[cdc_server_ip] = session
+        return session
+
+def pool_stats():
+    """{host: {"requests", "connections", "reused"}} for every pooled session."""
+    stats = {}
+    with _sessions_lock:
+        sessions = dict(_sessions)
+    for host, session in sessions.items():
+        total = {"requests": 0, "connections": 0}
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    total["requests"] += pool.num_requests
+                    total["connections"] += pool.num_connections
+        total["reused"] = max(total["requests"] - total["connections"], 0)
+        stats[host] = total
+    return stats
+
+# (ETag, body) of the last 200 response per URL that carried an ETag, for
+# the ETAG_CACHE_SIZE most recently used URLs. Polling the same URL again
+# sends If-None-Match, and a 304 is answered with the cached body.
+ETAG_CACHE_SIZE = int(os.environ.get("CDC_ETAG_CACHE_SIZE", "200"))
+_etag_cache = OrderedDict()
+_etag_cache_lock = threading.Lock()
+
+def conditional_get(url, session=None, **kwargs):
+    """GET `url`, revalidating a previously cached response with If-None-Match."""
+    http = session or requests
+    headers = dict(kwargs.pop("headers", None) or {})
+    with _etag_cache_lock:
+        cached = _etag_cache.get(url)
+        if cached is not None:
+            _etag_cache.move_to_end(url)
+    if cached is not None:
+        headers["If-None-Match"] = cached[0]
+    response = http.get(url, headers=headers, **kwargs)
+    if response.status_code == 304 and cached is not None:
+        # Turn the 304 into the 200 it stands for.
+        response.status_code = 200
+        response._content = cached[1]
+        return response
+    if response.status_code == 200:
+        with _etag_cache_lock:
+            if response.headers.get("ETag"):
+                _etag_cache[url] = (response.headers["ETag"], response.content)
+                _etag_cache.move_to_end(url)
+                while len(_etag_cache) > ETAG_CACHE_SIZE:
+                    _etag_cache.popitem(last=False)
+            else:
+                _etag_cache.pop(url, None)
+    return response
+
 def fetch_nvmenode_data(cdc_server_ip, command):
     url = f"https://"+cdc_server_ip+":8080/cdc/api/v1/{command}"
     try:
-        response = requests.get(url, verify=False)
+        response = conditional_get(url, session=get_session(cdc_server_ip), timeout=TIMEOUT)
         if response.status_code == 200:
             data = response.json()
             cdc_config = data["commandout"]["data"]["Info"]
@@ -23,7 +103,7 @@ def fetch_nvmenode_data(cdc_server_ip, command):
 def send_get_command(cdc_server_ip, command):
     url = f"https://{cdc_server_ip}:8080/cdc/api/v1/{command}"
     try:
-        response = requests.get(url, verify=False)
+        response = conditional_get(url, session=get_session(cdc_server_ip), timeout=TIMEOUT)
         if response.status_code == 200:
             json_data = response.json()
             return json_data
@@ -42,11 +122,11 @@ def create_zgrp(cdc_server_ip, zgrp_name):
         "zgrpName": zgrp_name
     }
     try:
-        response = requests.post(
+        response = get_session(cdc_server_ip).post(
             url, 
             headers=headers, 
             data=json.dumps(payload),
-            verify=False
+            timeout=TIMEOUT
         )
         if response.status_code == 200 or response.status_code == 201:
             return {"success": f"Zone Group '{zgrp_name}' created successfully", "response": response.json()}
@@ -66,11 +146,11 @@ def create_zone(cdc_server_ip, zone_name):
         "zoneName": zone_name
     }
     try:
-        response = requests.post(
+        response = get_session(cdc_server_ip).post(
             url, 
             headers=headers, 
             data=json.dumps(payload),
-            verify=False
+            timeout=TIMEOUT
         )
         if response.status_code == 200 or response.status_code == 201:
             return {"success": f"Zone '{zone_name}' created successfully", "response": response.json()}
@@ -89,11 +169,11 @@ def create_alias(cdc_server_ip, alias_name):
         "aliasName": alias_name
     }
     try:
-        response = requests.post(
+        response = get_session(cdc_server_ip).post(
             url, 
             headers=headers, 
             data=json.dumps(payload),
-            verify=False
+            timeout=TIMEOUT
         )
         if response.status_code == 200 or response.status_code == 201:
             return {"success": f"Alias '{alias_name}' created successfully", "response": response.json()}
@@ -111,11 +191,11 @@ def delete_zgrp(cdc_server_ip, zgrp_name):
         "zgrp_name": zgrp_name
     }
     try:
-        response = requests.delete(
+        response = get_session(cdc_server_ip).delete(
             url, 
             headers=headers,
             params=params,
-            verify=False
+            timeout=TIMEOUT
         )
         if response.status_code == 200 or response.status_code == 204:
             return {"success": f"Zong Group '{zgrp_name}' deleted successfully", "response": response.json() if response.text else "No content"}
@@ -133,11 +213,11 @@ def delete_zone(cdc_server_ip, zone_name):
         "zone_name": zone_name
     }
     try:
-        response = requests.delete(
+        response = get_session(cdc_server_ip).delete(
             url, 
             headers=headers,
             params=params,
-            verify=False
+            timeout=TIMEOUT
         )
         if response.status_code == 200 or response.status_code == 204:
             return {"success": f"Zone '{zone_name}' deleted successfully", "response": response.json() if response.text else "No content"}
@@ -155,11 +235,11 @@ def delete_alias(cdc_server_ip, alias_name):
         "alias_name": alias_name
     }
     try:
-        response = requests.delete(
+        response = get_session(cdc_server_ip).delete(
             url, 
             headers=headers,
             params=params,
-            verify=False
+            timeout=TIMEOUT
         )
         if response.status_code == 200 or response.status_code == 204:
             return {"success": f"Alias '{alias_name}' deleted successfully", "response": response.json() if response.text else "No content"}
@@ -175,6 +255,10 @@ if __name__ == "__main__":
     # Server IP input (reusing the same IP for all operations)
     cdc_server_ip = st.text_input("CDC Server IP", value="10.22.14.249")
     
+    with st.sidebar:
+        st.subheader("Connection pool")
+        st.json(pool_stats())
+
     # NVMe Nodes section
     st.header("NVMe Nodes")
     if st.button('Get NVMe Nodes'):
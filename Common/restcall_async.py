@@ -0,0 +1,135 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import restcall
+
+# asyncio front end for restcall: every call still goes through the
+# pooled per-host sessions in restcall, but requests to many CDC hosts are
+# issued at once, so refreshing N controllers takes about one round trip
+# instead of N. At most MAX_CONCURRENCY requests are in flight at a time.
+MAX_CONCURRENCY = int(os.environ.get("CDC_FANOUT_CONCURRENCY", "32"))
+
+# Dedicated pool: asyncio's default executor is capped at min(32, cpus + 4)
+# threads and is shared with anything else that uses to_thread().
+_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="cdc-fanout")
+
+# GET endpoints every CDC serves (zgrps/zones/aliases listings are only
+# offered by the simulator, so they are not part of the default inventory).
+INVENTORY_COMMANDS = ("summary", "nvmenodes", "interfaces")
+
+
+async def _call(fn, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(fn, *args))
+
+# Single-host coroutines. Like their restcall counterparts they never raise
+# for HTTP or connection failures; the result dict carries an "error" key.
+async def send_get_command(cdc_server_ip, command):
+    return await _call(restcall.send_get_command, cdc_server_ip, command)
+
+async def create_zgrp(cdc_server_ip, zgrp_name):
+    return await _call(restcall.create_zgrp, cdc_server_ip, zgrp_name)
+
+async def create_zone(cdc_server_ip, zone_name):
+    return await _call(restcall.create_zone, cdc_server_ip, zone_name)
+
+async def create_alias(cdc_server_ip, alias_name):
+    return await _call(restcall.create_alias, cdc_server_ip, alias_name)
+
+async def delete_zgrp(cdc_server_ip, zgrp_name):
+    return await _call(restcall.delete_zgrp, cdc_server_ip, zgrp_name)
+
+async def delete_zone(cdc_server_ip, zone_name):
+    return await _call(restcall.delete_zone, cdc_server_ip, zone_name)
+
+async def delete_alias(cdc_server_ip, alias_name):
+    return await _call(restcall.delete_alias, cdc_server_ip, alias_name)
+
+
+async def fan_out(cdc_server_ips, operation, *args, limit=MAX_CONCURRENCY):
+    """Run `operation(ip, *args)` for every CDC host concurrently.
+
+    `operation` is one of the coroutines above. Returns {ip: result} in
+    the order of `cdc_server_ips`; an unexpected exception for one host is
+    reported as {"error": ...} and does not cancel the others.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(ip):
+        async with semaphore:
+            try:
+                return await operation(ip, *args)
+            except Exception as e:
+                return {"error": str(e)}
+
+    ips = list(dict.fromkeys(cdc_server_ips))
+    results = await asyncio.gather(*(run(ip) for ip in ips))
+    return dict(zip(ips, results))
+
+async def fleet_get(cdc_server_ips, command, limit=MAX_CONCURRENCY):
+    """GET `command` from every CDC host: {ip: response or {"error": ...}}."""
+    return await fan_out(cdc_server_ips, send_get_command, command, limit=limit)
+
+async def fleet_inventory(cdc_server_ips, commands=INVENTORY_COMMANDS, limit=MAX_CONCURRENCY):
+    """Fetch every command in `commands` from every host, all concurrently.
+
+    Returns {ip: {command: response}}; the `limit` applies to the total
+    number of requests in flight, not per host.
+    """
+    semaphore = asyncio.Semaphore(limit)
+    ips = list(dict.fromkeys(cdc_server_ips))
+
+    async def run(ip, command):
+        async with semaphore:
+            try:
+                return await send_get_command(ip, command)
+            except Exception as e:
+                return {"error": str(e)}
+
+    pairs = [(ip, command) for ip in ips for command in commands]
+    results = await asyncio.gather(*(run(ip, command) for ip, command in pairs))
+    inventory = {ip: {} for ip in ips}
+    for (ip, command), result in zip(pairs, results):
+        inventory[ip][command] = result
+    return inventory
+
+
+def _records(response, key):
+    data = response.get("data") if isinstance(response, dict) else None
+    if isinstance(data, dict) and isinstance(data.get(key), list):
+        return data[key]
+    return []
+
+def merge_inventory(inventory):
+    """Combine a fleet_inventory() result into one fleet-wide view.
+
+    Each entity/interface (and zone group/zone/alias, when those commands
+    were fetched) is tagged with the "cdc" it came from; hosts whose
+    requests failed are listed under "errors" as {ip: {command: message}}
+    and contribute only what did succeed.
+    """
+    merged = {"summary": {}, "entities": [], "interfaces": [], "zgrps": [], "zones": [], "aliases": [],
+              "errors": {}}
+    for ip, responses in inventory.items():
+        for command, response in responses.items():
+            if not isinstance(response, dict) or "error" in response:
+                error = response.get("error") if isinstance(response, dict) else response
+                merged["errors"].setdefault(ip, {})[command] = error
+                continue
+            if command in ("summary", "nvmenode"):
+                data = response.get("data") or response.get("commandout", {}).get("data") or {}
+                merged["summary"][ip] = data.get("Info", data)
+            elif command == "nvmenodes":
+                merged["entities"].extend(dict(e, cdc=ip) for e in _records(response, "entities"))
+            elif command == "interfaces":
+                merged["interfaces"].extend(dict(i, cdc=ip) for i in _records(response, "cdc_interfaces"))
+            elif command in ("zgrps", "zones", "aliases"):
+                merged[command].extend(dict(o, cdc=ip) for o in _records(response, command))
+    return merged
+
+
+def refresh_fleet(cdc_server_ips, commands=INVENTORY_COMMANDS, limit=MAX_CONCURRENCY):
+    """Blocking helper for Streamlit pages: fetch and merge a fleet inventory."""
+    return merge_inventory(asyncio.run(fleet_inventory(cdc_server_ips, commands, limit)))
@@ -3,8 +3,13 @@ import requests
 import backoff # type: ignore
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from collections import OrderedDict
 from functools import wraps
+import json
+import os
+import threading
 import time
+from restcall import conditional_get, TIMEOUT
 
 class CDCAPIClient:
     def __init__(self, base_url):
@@ -27,78 +32,207 @@ class CDCAPIClient:
         session.mount("https://", adapter)
         return session
     
-    @backoff.on_exception(backoff.expo, requests.exceptions.RequestException, max_tries=3)
+    # 4xx answers will not change on retry; only server and network errors are retried.
+    @backoff.on_exception(backoff.expo, requests.exceptions.RequestException, max_tries=3,
+                          giveup=lambda e: e.response is not None and e.response.status_code < 500)
     def get(self, endpoint):
         url = f"{self.base_url}/{endpoint}"
-        response = self.session.get(url, verify=False)
+        response = conditional_get(url, session=self.session, verify=False, timeout=TIMEOUT)
         response.raise_for_status()
         return response.json()
 
-def get_cache_key(func_name, *args, **kwargs):
-    """Generate a unique cache key based on function name and arguments"""
-    return f"{func_name}_{str(args)}_{str(kwargs)}"
+@st.cache_resource(show_spinner=False)
+def get_client(cdc_server_ip):
+    """Long-lived CDCAPIClient for `cdc_server_ip`, shared by all sessions.
+
+    Keeps the client's session and connection pool alive between cache
+    misses, so a refresh costs one request instead of a new TLS handshake.
+    """
+    return CDCAPIClient(cdc_server_ip)
+
+# Process-wide response cache shared by every Streamlit session.
+CACHE_MAX_BYTES = int(os.environ.get("CDC_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+class _CacheEntry:
+    __slots__ = ("body", "size", "fetched", "ttl", "stale")
+
+    def __init__(self, body, ttl, stale):
+        self.body = body
+        self.size = len(body.encode())
+        self.fetched = time.monotonic()
+        self.ttl = ttl
+        self.stale = stale
+
+class ResponseCache:
+    """Per-key TTL cache, LRU-bounded by total bytes, with stale-while-revalidate.
+
+    An entry is fresh for `ttl` seconds. For `stale` seconds after that it
+    is still returned, and a background thread reloads it; older entries
+    are reloaded before returning. Values are kept as JSON text, which
+    both measures their size and gives each caller its own copy.
+    """
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._loading = {}          # key -> Event while a synchronous load runs
+        self._refreshing = set()    # keys with a background refresh in progress
+        self.counts = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0,
+                       "refresh_errors": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, key, loader, ttl, stale=0):
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                age = time.monotonic() - entry.fetched if entry is not None else None
+                if entry is not None and age < entry.ttl:
+                    self._entries.move_to_end(key)
+                    self.counts["hits"] += 1
+                    return json.loads(entry.body)
+                if entry is not None and age < entry.ttl + entry.stale:
+                    self._entries.move_to_end(key)
+                    self.counts["stale_hits"] += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        threading.Thread(target=self._refresh, args=(key, loader, ttl, stale),
+                                         daemon=True, name="cdc-cache-refresh").start()
+                    return json.loads(entry.body)
+                waiting = self._loading.get(key)
+                if waiting is None:
+                    done = self._loading[key] = threading.Event()
+                    self.counts["misses"] += 1
+                    break
+            # Another session is already loading this key; use its result.
+            waiting.wait()
+        try:
+            value = loader()
+            self._store(key, value, ttl, stale)
+            return value
+        finally:
+            with self._lock:
+                del self._loading[key]
+            done.set()
+
+    def _refresh(self, key, loader, ttl, stale):
+        try:
+            self._store(key, loader(), ttl, stale)
+            with self._lock:
+                self.counts["refreshes"] += 1
+        except Exception:
+            # Keep serving the stale copy until it ages out.
+            with self._lock:
+                self.counts["refresh_errors"] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _store(self, key, value, ttl, stale):
+        entry = _CacheEntry(json.dumps(value, separators=(",", ":")), ttl, stale)
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.counts["evictions"] += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry.size
+                self.counts["invalidations"] += 1
+            return entry is not None
+
+    def invalidate_where(self, predicate):
+        """Drop every entry whose key satisfies `predicate`; returns how many."""
+        with self._lock:
+            keys = [k for k in self._entries if predicate(k)]
+        return sum(self.invalidate(k) for k in keys)
+
+    def clear(self):
+        with self._lock:
+            self.counts["invalidations"] += len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counts, entries=len(self._entries), bytes=self._bytes,
+                         max_bytes=self.max_bytes)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["stale_hits"]) / lookups if lookups else 0.0
+        return stats
+
+@st.cache_resource(show_spinner=False)
+def get_response_cache():
+    """The ResponseCache shared by all sessions in this process."""
+    return ResponseCache()
 
 def clear_all_caches():
     """Clear all cached data"""
-    # Clear Streamlit's cache
+    get_response_cache().clear()
     st.cache_data.clear()
     
-    # Reset cache-related session state variables
-    for key in list(st.session_state.keys()):
-        if key.startswith('cache_'):
-            del st.session_state[key]
-    
     # Update last reset timestamp
     st.session_state.last_cache_reset = time.time()
-    st.session_state.force_refresh = False
 
-def cache_with_reset(ttl_seconds=60):
-    """ Custom cache decorator that supports manual reset and TTL
+def invalidate_server(cdc_server_ip):
+    """Drop the cached responses of one CDC server; returns how many.
+
+    Keys of shared_cache functions are (module, name, args, kwargs), and
+    every cached fetch takes the server IP as its first argument.
+    """
+    return get_response_cache().invalidate_where(lambda key: key[2][:1] == (cdc_server_ip,))
+
+def shared_cache(ttl_seconds=60, stale_seconds=None):
+    """ Cache a function's JSON result in the process-wide ResponseCache
     Parameters:
-    ttl_seconds (int): Time to live for cached data in seconds
+    ttl_seconds (int): Seconds a result is served without refetching
+    stale_seconds (int): Further seconds a result is served while it is
+        refreshed in the background (defaults to ttl_seconds)
+    The wrapper gains invalidate(*args, **kwargs) to drop one cached call.
     """
+    stale = ttl_seconds if stale_seconds is None else stale_seconds
     def decorator(func):
-        @st.cache_data(ttl=ttl_seconds)
-        def cached_func(*args, **kwargs):
-            return func(*args, **kwargs)
-        
+        def cache_key(args, kwargs):
+            return (func.__module__, func.__qualname__, args, tuple(sorted(kwargs.items())))
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            cache_key = get_cache_key(func.__name__, *args, **kwargs)
-            
-            # Check if we need to force refresh
-            force_refresh = st.session_state.get('force_refresh', False)
-            
-            # Check if cache has expired
-            last_update = st.session_state.get(f'cache_time_{cache_key}', 0)
-            cache_expired = (time.time() - last_update) > ttl_seconds
-            
-            if force_refresh or cache_expired:
-                cached_func.clear()
-                st.session_state[f'cache_time_{cache_key}'] = time.time()
-            
-            return cached_func(*args, **kwargs)
+            return get_response_cache().get(
+                cache_key(args, kwargs), lambda: func(*args, **kwargs), ttl_seconds, stale)
+
+        def invalidate(*args, **kwargs):
+            return get_response_cache().invalidate(cache_key(args, kwargs))
+
+        wrapper.invalidate = invalidate
         return wrapper
     return decorator
 
-@cache_with_reset(ttl_seconds=60)  # Cache for 1 minute
+@shared_cache(ttl_seconds=60)  # Cache for 1 minute
 def fetch_nvmenode_data(cdc_server_ip):
     """ Fetch NVMe node data with caching
     Parameters: cdc_server_ip (str): IP address of the CDC server
     Returns: dict: JSON response containing node data
     """
-    client = CDCAPIClient(cdc_server_ip)
-    return client.get("nvmenode")
+    return get_client(cdc_server_ip).get("nvmenode")
 
-@cache_with_reset(ttl_seconds=300)  # Cache for 5 minutes
+@shared_cache(ttl_seconds=300)  # Cache for 5 minutes
 def send_get_command(cdc_server_ip, command):
     """ Send a GET command to CDC server with caching
     Parameters: cdc_server_ip (str): IP address of the CDC server
     command (str): Command to send
     Returns: dict: JSON response from the server
     """
-    client = CDCAPIClient(cdc_server_ip)
-    return client.get(command)
+    return get_client(cdc_server_ip).get(command)
 
 def add_cache_management_ui():
     """Add cache management UI elements to the sidebar"""
@@ -112,6 +246,11 @@ def add_cache_management_ui():
                 time.localtime(st.session_state.last_cache_reset)
             )
             st.text(f"Last Reset: {last_reset}")
+
+        stats = get_response_cache().stats()
+        st.text(f"Hit rate: {stats['hit_rate']:.0%} ({stats['hits'] + stats['stale_hits']}/"
+                f"{stats['hits'] + stats['stale_hits'] + stats['misses']})")
+        st.text(f"Entries: {stats['entries']}, {stats['bytes'] / 1024:.0f} KiB")
         
         # Add manual refresh button
         if st.button("🔄 Refresh All Data", key="refresh_cache"):
@@ -144,7 +283,11 @@ def manage_auto_refresh():
     if interval > 0:
         time_since_refresh = time.time() - st.session_state.last_auto_refresh
         if time_since_refresh >= interval:
-            clear_all_caches()
+            # The cache is shared by every session: refetch only this
+            # session's server instead of clearing it for everyone.
+            server = st.session_state.get('cdc_server_ip') or st.session_state.get('server')
+            if server:
+                invalidate_server(server)
             st.session_state.last_auto_refresh = time.time()
             st.rerun()
 
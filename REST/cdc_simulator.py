@@ -0,0 +1,219 @@
+# REST/cdc_simulator.py
+"""Local stand-in for a CDC appliance's https://<ip>:8080/cdc/api/v1 API.
+
+Serves the endpoints used by Common/restcall.py, Common/restncache.py and
+Common/dashboard.py (nvmenode, nvmenodes, summary, interfaces, zgrp, zone,
+alias) from a synthetic fabric, with optional injected latency and errors,
+so the client paths can be benchmarked without hardware:
+
+    python REST/cdc_simulator.py --hosts 2000 --controllers 200 --latency-ms 20 --error-rate 0.01
+
+Injection settings can be changed while running with
+POST /sim/config {"latency_ms": .., "jitter_ms": .., "error_rate": ..};
+GET /sim/stats returns request counters.
+"""
+import argparse
+import random
+import threading
+import time
+
+from flask import Flask, request, jsonify
+
+app = Flask(__name__)
+
+settings = {"latency_ms": 0.0, "jitter_ms": 0.0, "error_rate": 0.0}
+stats = {"requests": 0, "injected_errors": 0}
+stats_lock = threading.Lock()
+
+fabric_lock = threading.Lock()
+fabric = {"entities": [], "interfaces": [], "zgrps": {}, "zones": {}, "aliases": {}}
+
+
+# ---- SYNTHETIC FABRIC ----
+def _node_nqn(entity_type, nqn, ip, rng):
+    return {
+        "admin_max_sq_size": 32,
+        "node_type": "NVMe Host" if entity_type == "NVMe Host" else "NVMe DC",
+        "nqn": nqn,
+        "ip": ip,
+        "port_id": rng.randint(1000, 65000),
+        "treq": 0,
+        "tsas": "",
+        "trsvcid": "4420",
+    }
+
+def build_fabric(hosts, controllers, portals_per_entity, seed):
+    """Entities in the layout of data/regd_nodes2.json, plus CDC interfaces."""
+    rng = random.Random(seed)
+    entities = []
+    index = 1
+    for n in range(controllers + hosts):
+        is_host = n >= controllers
+        entity_type = "NVMe Host" if is_host else "NVMe Controller"
+        base_nqn = (f"nqn.2014-08.org.nvmexpress:uuid:host{n}" if is_host
+                    else f"nqn.2014-08.org.nvmexpress:uuid:subsys{n}")
+        portals = []
+        for p in range(rng.randint(1, portals_per_entity)):
+            ip = f"10.{(n >> 8) & 255}.{n & 255}.{p + 1}"
+            portals.append({
+                "index": index,
+                "nqn_count": 1,
+                "portal_ip": ip,
+                "node_nqns": [_node_nqn(entity_type, base_nqn, ip, rng)],
+            })
+            index += 1
+        entities.append({
+            "entity_id": base_nqn if is_host else f"1.1.{n >> 8}.{n & 255}",
+            "entity_type": entity_type,
+            "entity_version": "vX-sim",
+            "name": f"sim-{'host' if is_host else 'ctrl'}-{n}",
+            "portal_count": len(portals),
+            "portals": portals,
+        })
+    interfaces = [{"name": f"eth{i}", "ip": f"192.168.{i}.10/24", "state": "up"} for i in range(2)]
+    with fabric_lock:
+        fabric.update(entities=entities, interfaces=interfaces, zgrps={}, zones={}, aliases={})
+
+
+def summary_info():
+    with fabric_lock:
+        entities = fabric["entities"]
+        return {
+            "CDC Version": "sim-1.0",
+            "CDC NQN": "nqn.2014-08.org.nvmexpress.discovery.sim",
+            "Zone mode": "enabled",
+            "NVMe TCP Port": 8009,
+            "MDNS supported": True,
+            "KATO value": 120000,
+            "Buf2LDAP Q depth": 1024,
+            "CDC mode": "standalone",
+            "log-level": "INFO",
+            "Config file location": "/etc/cdc/cdc.conf",
+            "Backup file location": "/var/lib/cdc/backup",
+            "Backup enabled": True,
+            "No of Regd Endnodes": len(entities),
+            "No of Regd Ifaces": len(fabric["interfaces"]),
+            "No of Regd Portals": sum(e["portal_count"] for e in entities),
+            "No of Aliases": len(fabric["aliases"]),
+            "No of Zones": len(fabric["zones"]),
+        }
+
+
+# ---- FAULT INJECTION ----
+@app.before_request
+def inject():
+    if request.path.startswith("/sim/"):
+        return None
+    with stats_lock:
+        stats["requests"] += 1
+    delay = settings["latency_ms"] + random.uniform(-1, 1) * settings["jitter_ms"]
+    if delay > 0:
+        time.sleep(delay / 1000.0)
+    if settings["error_rate"] and random.random() < settings["error_rate"]:
+        with stats_lock:
+            stats["injected_errors"] += 1
+        return jsonify({"code": 503, "status": "Injected failure"}), 503
+    return None
+
+@app.route("/sim/config", methods=["POST"])
+def sim_config():
+    body = request.get_json(silent=True) or {}
+    for key in settings:
+        if key in body:
+            settings[key] = float(body[key])
+    return jsonify(settings)
+
+@app.route("/sim/stats", methods=["GET"])
+def sim_stats():
+    with stats_lock:
+        return jsonify(dict(stats, **settings))
+
+
+# ---- READ API ----
+def ok(data):
+    return jsonify({"code": 200, "status": "OK", "data": data})
+
+@app.route("/cdc/api/v1/nvmenode", methods=["GET"])
+@app.route("/cdc/api/v1/summary", methods=["GET"])
+def summary():
+    info = summary_info()
+    # Both layouts are in use by the clients.
+    return jsonify({"code": 200, "status": "OK", "data": {"Info": info}, "commandout": {"data": {"Info": info}}})
+
+@app.route("/cdc/api/v1/nvmenodes", methods=["GET"])
+def nvmenodes():
+    with fabric_lock:
+        entities = list(fabric["entities"])
+    return ok({"count": len(entities), "entities": entities})
+
+@app.route("/cdc/api/v1/interfaces", methods=["GET"])
+def interfaces():
+    with fabric_lock:
+        return ok({"count": len(fabric["interfaces"]), "cdc_interfaces": fabric["interfaces"]})
+
+@app.route("/cdc/api/v1/zgrps", methods=["GET"])
+@app.route("/cdc/api/v1/zones", methods=["GET"])
+@app.route("/cdc/api/v1/aliases", methods=["GET"])
+def list_objects():
+    kind = request.path.rsplit("/", 1)[1]
+    with fabric_lock:
+        objects = list(fabric[kind].values())
+    return ok({"count": len(objects), kind: objects})
+
+
+# ---- ZONE GROUP / ZONE / ALIAS ----
+# Clients send the object name in the body (zgrpName/zoneName/aliasName)
+# or, for deletes, in a query parameter (zgrp_name/...); the path segment
+# is used when neither is present.
+OBJECT_KINDS = {"zgrp": "zgrps", "zone": "zones", "alias": "aliases"}
+
+def object_name(kind, path_name):
+    body = request.get_json(silent=True) or {}
+    return body.get(f"{kind}Name") or request.args.get(f"{kind}_name") or path_name
+
+@app.route("/cdc/api/v1/<kind>/<path_name>", methods=["POST"])
+def create_object(kind, path_name):
+    if kind not in OBJECT_KINDS:
+        return jsonify({"code": 404, "status": f"Unknown object type '{kind}'"}), 404
+    name = object_name(kind, path_name)
+    with fabric_lock:
+        objects = fabric[OBJECT_KINDS[kind]]
+        if name in objects:
+            return jsonify({"code": 409, "status": f"{kind} '{name}' already exists"}), 409
+        objects[name] = {"name": name, "created": time.time()}
+    return jsonify({"code": 201, "status": "Created", "data": {"name": name}}), 201
+
+@app.route("/cdc/api/v1/<kind>/<path_name>", methods=["DELETE"])
+def delete_object(kind, path_name):
+    if kind not in OBJECT_KINDS:
+        return jsonify({"code": 404, "status": f"Unknown object type '{kind}'"}), 404
+    name = object_name(kind, path_name)
+    with fabric_lock:
+        if fabric[OBJECT_KINDS[kind]].pop(name, None) is None:
+            return jsonify({"code": 404, "status": f"{kind} '{name}' not found"}), 404
+    return jsonify({"code": 200, "status": "Deleted", "data": {"name": name}}), 200
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local CDC appliance API simulator")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--hosts", type=int, default=100, help="NVMe host entities")
+    parser.add_argument("--controllers", type=int, default=20, help="NVMe controller entities")
+    parser.add_argument("--portals", type=int, default=4, help="max portals per entity")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 503")
+    parser.add_argument("--no-tls", action="store_true",
+                        help="serve plain HTTP (clients use https://, which needs the cryptography package for an ad-hoc cert)")
+    args = parser.parse_args()
+
+    settings.update(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate)
+    build_fabric(args.hosts, args.controllers, args.portals, args.seed)
+    app.run(host=args.host, port=args.port, threaded=True,
+            ssl_context=None if args.no_tls else "adhoc")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# REST/change_feed.py
+import json
+import os
+import threading
+import time
+from collections import deque
+from itertools import islice
+
+FEED_SIZE = int(os.environ.get("CDC_CHANGE_FEED_SIZE", "10000"))
+HEARTBEAT_SECONDS = 15
+
+
+class ChangeFeed:
+    """Bounded in-memory log of recent mutations, numbered by a global sequence.
+
+    Each event is a small dict:
+        {"seq": 42, "entity": "zone", "id": "17", "name": "z1",
+         "op": "create", "doc": "zones", "revision": 9}
+    plus "section" and "value" (the new object) on creates. "op" is
+    "create", "delete" or, when a document was reloaded or merged from
+    disk, "reload" (no id: re-fetch that document). Sequence numbers
+    restart with the server; `started` identifies the run, and cursors
+    are written "<started>:<seq>" so a client of an earlier run resyncs.
+    """
+
+    def __init__(self, size=FEED_SIZE):
+        self.started = int(time.time())
+        self._events = deque(maxlen=size)
+        self._seq = 0
+        self._cond = threading.Condition()
+
+    @property
+    def seq(self):
+        with self._cond:
+            return self._seq
+
+    def cursor(self, seq):
+        return f"{self.started}:{seq}"
+
+    def parse_cursor(self, cursor):
+        """Sequence number of a cursor from this run; -1 (resync) otherwise."""
+        started, _, seq = (cursor or "").partition(":")
+        if started != str(self.started) or not seq.isdigit():
+            return -1
+        return int(seq)
+
+    def publish(self, doc, revision, changes):
+        """Append `changes` (event bodies) as committed in `doc` at `revision`."""
+        with self._cond:
+            for change in changes:
+                self._seq += 1
+                event = {"seq": self._seq}
+                event.update(change)
+                event.update(doc=doc, revision=revision)
+                self._events.append(event)
+            self._cond.notify_all()
+
+    def since(self, seq):
+        """Events after `seq`, or None if some of them already fell out of the ring."""
+        with self._cond:
+            return self._since(seq)
+
+    def _since(self, seq):
+        if seq == self._seq:
+            return []
+        if seq < 0 or seq > self._seq or self._events[0]["seq"] > seq + 1:
+            return None
+        # Sequence numbers are contiguous, so the offset is direct.
+        start = seq + 1 - self._events[0]["seq"]
+        return list(islice(self._events, start, None))
+
+    def wait(self, seq, timeout):
+        """Block until there are events after `seq` (or timeout); returns since(seq)."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > seq, timeout)
+            return self._since(seq)
+
+
+def sse_stream(feed, last_seq):
+    """Server-Sent Events for `feed` starting after `last_seq`.
+
+    A client that fell behind the ring (or reconnects after a restart)
+    gets one "resync" event and then continues from the current sequence.
+    """
+    yield "retry: 3000\n\n"
+    while True:
+        events = feed.wait(last_seq, HEARTBEAT_SECONDS)
+        if events is None:
+            last_seq = feed.seq
+            yield f"id: {feed.cursor(last_seq)}\nevent: resync\ndata: {json.dumps({'seq': last_seq})}\n\n"
+            continue
+        if not events:
+            yield ": keepalive\n\n"
+            continue
+        for event in events:
+            yield f"id: {feed.cursor(event['seq'])}\nevent: change\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+        last_seq = events[-1]["seq"]
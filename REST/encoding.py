@@ -0,0 +1,66 @@
+# REST/encoding.py
+import json
+import zlib
+
+CHUNK_SIZE = 64 * 1024
+# Bodies smaller than this are sent uncompressed.
+COMPRESS_MIN_BYTES = 1024
+
+
+def negotiate_encoding(accept_encoding):
+    """Pick "gzip", "deflate" or None from an Accept-Encoding header."""
+    offered = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        offered[coding.strip().lower()] = q
+    for coding in ("gzip", "deflate"):
+        if offered.get(coding, offered.get("*", 0)) > 0:
+            return coding
+    return None
+
+
+def _compressor(encoding):
+    # wbits 31 = gzip container, 15 = zlib container (HTTP "deflate").
+    return zlib.compressobj(6, zlib.DEFLATED, 31 if encoding == "gzip" else 15)
+
+
+def encode_chunks(obj, encoding=None, chunk_size=CHUNK_SIZE):
+    """JSON-encode `obj` incrementally into a list of byte chunks.
+
+    The encoder walks `obj` piece by piece (JSONEncoder.iterencode) and
+    each ~chunk_size of text is compressed as it is produced, so neither
+    the full JSON string nor an uncompressed copy is ever built. The
+    (compressed) result is buffered in full, since callers cache it and
+    send its length; `obj` must not change while this runs. Returns
+    (chunks, encoding actually used, total bytes).
+    """
+    encoder = json.JSONEncoder(separators=(",", ":"))
+    compressor = None
+    chunks = []
+    buffer = []
+    buffered = 0
+    for piece in encoder.iterencode(obj):
+        buffer.append(piece)
+        buffered += len(piece)
+        if buffered >= chunk_size:
+            data = "".join(buffer).encode()
+            buffer, buffered = [], 0
+            if encoding and compressor is None:
+                compressor = _compressor(encoding)
+            chunks.append(compressor.compress(data) if compressor else data)
+    data = "".join(buffer).encode()
+    if compressor is None and encoding and (chunks or len(data) >= COMPRESS_MIN_BYTES):
+        compressor = _compressor(encoding)
+    if compressor is not None:
+        chunks.append(compressor.compress(data) + compressor.flush())
+    else:
+        chunks.append(data)
+    chunks = [c for c in chunks if c]
+    return chunks, encoding if compressor is not None else None, sum(len(c) for c in chunks)
@@ -0,0 +1,106 @@
+# REST/idempotency.py
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, make_response, jsonify
+
+IDEMPOTENCY_TTL = float(os.environ.get("CDC_IDEMPOTENCY_TTL", "600"))
+IDEMPOTENCY_MAX_KEYS = int(os.environ.get("CDC_IDEMPOTENCY_MAX_KEYS", "10000"))
+IN_FLIGHT_WAIT = 30
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "expires", "done", "response")
+
+    def __init__(self, fingerprint, expires):
+        self.fingerprint = fingerprint
+        self.expires = expires
+        self.done = threading.Event()
+        self.response = None    # (body, status, headers) once finished
+
+
+class IdempotencyStore:
+    """Results of recent mutating requests, keyed by their Idempotency-Key.
+
+    Bounded by `max_keys` (least recently used first out) and by `ttl`
+    seconds. A retry that arrives while the first attempt is still
+    running waits for it instead of executing the operation twice.
+    """
+
+    def __init__(self, ttl=IDEMPOTENCY_TTL, max_keys=IDEMPOTENCY_MAX_KEYS):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.replays = 0
+
+    def begin(self, key, fingerprint):
+        """Return (entry, owner): owner is True if the caller must run the request."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires > now:
+                self._entries.move_to_end(key)
+                return entry, False
+            entry = self._entries[key] = _Entry(fingerprint, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+            return entry, True
+
+    def finish(self, key, entry, response):
+        entry.response = response
+        entry.done.set()
+
+    def abandon(self, key, entry):
+        # Failed attempts (5xx, exceptions) are not remembered: a retry runs again.
+        with self._lock:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+        entry.done.set()
+
+
+def idempotent(store):
+    """Make a Flask view replay its first response for a repeated Idempotency-Key.
+
+    The key is scoped to method and path, and the request body must match
+    the first use (422 otherwise). Requests without the header are unaffected.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get("Idempotency-Key")
+            if not key:
+                return view(*args, **kwargs)
+            scoped_key = (request.method, request.path, key)
+            fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+            entry, owner = store.begin(scoped_key, fingerprint)
+
+            if not owner:
+                if entry.fingerprint != fingerprint:
+                    return jsonify({"error": "Idempotency-Key reused with a different request body"}), 422
+                if not entry.done.wait(IN_FLIGHT_WAIT) or entry.response is None:
+                    return jsonify({"error": "Original request with this Idempotency-Key did not complete"}), 409
+                body, status, headers = entry.response
+                store.replays += 1
+                response = make_response(body, status, headers)
+                response.headers["Idempotent-Replayed"] = "true"
+                return response
+
+            try:
+                response = make_response(view(*args, **kwargs))
+            except Exception:
+                store.abandon(scoped_key, entry)
+                raise
+            if response.status_code >= 500:
+                store.abandon(scoped_key, entry)
+            else:
+                headers = [(k, v) for k, v in response.headers.items() if k.lower() != "content-length"]
+                store.finish(scoped_key, entry, (response.get_data(), response.status_code, headers))
+            return response
+        return wrapper
+    return decorator
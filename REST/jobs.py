@@ -0,0 +1,166 @@
+# REST/jobs.py
+import atexit
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+JOB_WORKERS = int(os.environ.get("CDC_JOB_WORKERS", "2"))
+JOB_HISTORY = int(os.environ.get("CDC_JOB_HISTORY", "200"))
+
+
+class Job:
+    """One submitted bulk operation and its progress."""
+
+    def __init__(self, kind, total):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"      # queued, running, succeeded, partial, failed, cancelled
+        self.total = total
+        self.processed = 0
+        self.failed = 0
+        self.results = []
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_requested = False   # work() stops at its next chunk when set
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Mark a queued job as running; False if it was cancelled meanwhile."""
+        with self._lock:
+            if self.status != "queued":
+                return False
+            self.status = "running"
+            self.started = time.time()
+            return True
+
+    def finish(self, error=None):
+        with self._lock:
+            if error is not None:
+                self.status = "failed"
+                self.error = error
+            elif self.cancel_requested:
+                self.status = "cancelled"
+            else:
+                self.status = "partial" if self.failed else "succeeded"
+            self.finished = time.time()
+
+    def cancel(self):
+        """Cancel a queued job; a running one stops after its current chunk."""
+        with self._lock:
+            if self.finished is not None:
+                return False
+            self.cancel_requested = True
+            if self.status == "queued":
+                self.status = "cancelled"
+                self.finished = time.time()
+            return True
+
+    def record(self, results, failed):
+        """Add the per-item results of a finished chunk."""
+        with self._lock:
+            self.results.extend(results)
+            self.processed += len(results)
+            self.failed += failed
+
+    def to_dict(self, offset=0, limit=None):
+        with self._lock:
+            end = None if limit is None else offset + limit
+            return {
+                "id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "total": self.total,
+                "processed": self.processed,
+                "failed": self.failed,
+                "progress": self.processed / self.total if self.total else 1.0,
+                "error": self.error,
+                "created": self.created,
+                "started": self.started,
+                "finished": self.finished,
+                "results_offset": offset,
+                "results": self.results[offset:end],
+            }
+
+
+class JobManager:
+    """Runs jobs on a small pool of daemon workers and keeps the last `history` of them.
+
+    submit(kind, total, work) returns the Job at once; work(job) runs on a
+    worker thread, reports progress with job.record() and should return
+    early once job.cancel_requested is set. The job ends as "succeeded",
+    "partial" (some items failed), "failed" (work raised) or "cancelled".
+    shutdown(), also run at interpreter exit, cancels queued jobs and
+    waits a bounded time for running ones to reach a chunk boundary.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, history=JOB_HISTORY):
+        self.history = history
+        self._queue = queue.Queue()
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._workers = [threading.Thread(target=self._worker, name=f"cdc-job-{i}", daemon=True)
+                         for i in range(workers)]
+        for worker in self._workers:
+            worker.start()
+        atexit.register(self.shutdown)
+
+    def submit(self, kind, total, work):
+        job = Job(kind, total)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Job manager is shut down")
+            self._jobs[job.id] = job
+            self._trim()
+            self._queue.put((job, work))
+        return job
+
+    def _trim(self):
+        # Forget the oldest finished jobs; queued and running ones stay.
+        excess = len(self._jobs) - self.history
+        for job_id in [j.id for j in self._jobs.values() if j.finished][:max(excess, 0)]:
+            del self._jobs[job_id]
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            job, work = item
+            if not job.start():
+                continue    # cancelled while queued
+            try:
+                work(job)
+            except Exception as e:
+                job.finish(error=str(e))
+            else:
+                job.finish()
+
+    def shutdown(self, timeout=5.0):
+        """Cancel queued jobs, stop running ones at their next chunk and stop the workers."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job.cancel()
+        for _ in self._workers:
+            self._queue.put(None)
+        deadline = time.monotonic() + timeout
+        for worker in self._workers:
+            worker.join(max(deadline - time.monotonic(), 0))
+        atexit.unregister(self.shutdown)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(self._jobs.values())
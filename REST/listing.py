@@ -0,0 +1,108 @@
+# REST/listing.py
+import base64
+import bisect
+import threading
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+class ListingError(ValueError):
+    """Bad pagination or filter parameter (reported as 400)."""
+
+
+class NameListing:
+    """Name-sorted (name, section, id) rows of one document, rebuilt per revision.
+
+    The sort happens once per revision of the document; a page request is
+    then a bisect to its prefix/cursor position plus a scan of at most
+    `limit` matching rows.
+    """
+
+    def __init__(self, sections):
+        self.sections = sections
+        self._lock = threading.Lock()
+        self._revision = None
+        self._names = []
+        self._rows = []
+
+    def rows(self, revision, data):
+        with self._lock:
+            if revision != self._revision:
+                rows = sorted(
+                    (obj.get("name", ""), section, obj_id)
+                    for section in self.sections
+                    for obj_id, obj in data.get(section, {}).items()
+                )
+                self._rows = rows
+                self._names = [row[0] for row in rows]
+                self._revision = revision
+            return self._names, self._rows
+
+
+def encode_cursor(name):
+    return base64.urlsafe_b64encode(name.encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        return base64.urlsafe_b64decode(cursor.encode()).decode()
+    except (ValueError, UnicodeDecodeError):
+        raise ListingError("Invalid cursor")
+
+
+def parse_args(args):
+    """Pagination/filter settings from the query string, or None for the legacy full response."""
+    if not any(k in args for k in ("limit", "cursor", "prefix", "type", "fields")):
+        return None
+    limit = args.get("limit", DEFAULT_LIMIT)
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ListingError("limit must be an integer")
+    if limit < 1:
+        raise ListingError("limit must be at least 1")
+    fields = args.get("fields")
+    return {
+        "limit": min(limit, MAX_LIMIT),
+        "after": decode_cursor(args["cursor"]) if args.get("cursor") else None,
+        "prefix": args.get("prefix", ""),
+        "type": args.get("type"),
+        "fields": [f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+    }
+
+
+def page(listing, revision, data, params, matches_type):
+    """One page of `data` as {"items", "count", "next_cursor"}.
+
+    `matches_type(section, obj, type)` implements the document's type filter.
+    Items carry "id" and "section" next to the object's own fields; with
+    fields= only the listed keys (plus "id") are returned.
+    """
+    names, rows = listing.rows(revision, data)
+    prefix = params["prefix"]
+    start = bisect.bisect_left(names, prefix)
+    if params["after"] is not None:
+        start = max(start, bisect.bisect_right(names, params["after"]))
+
+    items = []
+    last_name = None
+    next_cursor = None
+    for position in range(start, len(rows)):
+        name, section, obj_id = rows[position]
+        if not name.startswith(prefix):
+            break
+        obj = data.get(section, {}).get(obj_id)
+        if obj is None:
+            continue
+        if params["type"] and not matches_type(section, obj, params["type"]):
+            continue
+        if len(items) == params["limit"]:
+            next_cursor = encode_cursor(last_name)
+            break
+        item = {"id": obj_id, "section": section}
+        item.update(obj)
+        if params["fields"]:
+            item = {k: item[k] for k in ["id"] + params["fields"] if k in item}
+        items.append(item)
+        last_name = name
+    return {"items": items, "count": len(items), "next_cursor": next_cursor}
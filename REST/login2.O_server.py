@@ -1,23 +1,32 @@
 # RESTserver/login_server.py
 from flask import Flask, request, jsonify
 import json
-import bcrypt
+from session_tokens import PasswordVerifier, LoginBusy, issue_token, SESSION_TTL
 
 app = Flask(__name__)
 
 with open("data/login_credentials.json", "r") as f:
     credentials = json.load(f)
 
+password_verifier = PasswordVerifier(credentials)
+
 @app.route("/login", methods=["POST"])
 def login():
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     username = data.get("username")
     password = data.get("password")
 
-    if username in credentials:
-        hashed_pw = credentials[username].encode()
-        if bcrypt.checkpw(password.encode(), hashed_pw):
-            return jsonify({"success": True, "message": "Login successful"}), 200
+    try:
+        valid = password_verifier.verify(username, password)
+    except LoginBusy:
+        return jsonify({"success": False, "message": "Too many login attempts, retry shortly"}), 503, {"Retry-After": "1"}
+    if valid:
+        return jsonify({
+            "success": True,
+            "message": "Login successful",
+            "token": issue_token(username),
+            "expires_in": SESSION_TTL
+        }), 200
 
     return jsonify({"success": False, "message": "Invalid credentials"}), 401
 
@@ -0,0 +1,86 @@
+# REST/replica.py
+import threading
+
+import requests
+
+# Document -> (GET endpoint, sections) kept by ZoneReplica.
+REPLICATED = {
+    "zones": ("zones", ("active_zones", "inactive_zones")),
+    "alias": ("aliases", ("member_aliases", "free_aliases")),
+}
+
+
+class ZoneReplica:
+    """Local copy of the REST server's zones and aliases kept current by delta sync.
+
+    The first sync() fetches both documents in full; later calls ask
+    GET /changes for what happened since and apply those events, which
+    usually means a response of a few hundred bytes. A "reload" event or
+    a resync_required answer re-fetches the affected documents.
+
+        replica = ZoneReplica("http://localhost:5001")
+        replica.sync()            # e.g. on every dashboard rerun
+        replica.docs["zones"]
+    """
+
+    def __init__(self, server, session=None, timeout=10):
+        self.base_url = f"{server.rstrip('/')}/cdc/api/v1"
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.docs = {}
+        self.revisions = {}
+        self.cursor = None
+        self.full_fetches = 0
+        self.delta_syncs = 0
+
+    def _fetch(self, doc):
+        endpoint, _ = REPLICATED[doc]
+        response = self.session.get(f"{self.base_url}/{endpoint}", timeout=self.timeout)
+        response.raise_for_status()
+        self.docs[doc] = response.json()
+        self.revisions[doc] = int(response.headers.get("X-CDC-Revision", 0))
+        self.full_fetches += 1
+        return response.headers.get("X-CDC-Change-Cursor")
+
+    def _resync(self):
+        # Fetch in full, then resume from the oldest cursor so nothing
+        # between the two GETs is missed (replaying an event is harmless).
+        cursors = [self._fetch(doc) for doc in REPLICATED]
+        self.cursor = min(cursors, key=lambda c: int(c.rpartition(":")[2]))
+
+    def _apply(self, event):
+        doc = event["doc"]
+        if doc not in REPLICATED:
+            return
+        if event["op"] == "reload":
+            self._fetch(doc)
+            return
+        data = self.docs[doc]
+        for section in REPLICATED[doc][1]:
+            data.setdefault(section, {}).pop(event["id"], None)
+        if event["op"] == "create":
+            data.setdefault(event["section"], {})[event["id"]] = event["value"]
+        self.revisions[doc] = max(self.revisions.get(doc, 0), event["revision"])
+
+    def sync(self, wait=0):
+        """Bring the replica up to date; `wait` > 0 long-polls for the next change."""
+        with self.lock:
+            if self.cursor is None:
+                self._resync()
+                return True
+            response = self.session.get(
+                f"{self.base_url}/changes",
+                params={"since": self.cursor, "wait": wait},
+                timeout=self.timeout + wait,
+            )
+            response.raise_for_status()
+            body = response.json()
+            self.delta_syncs += 1
+            if body["resync_required"]:
+                self._resync()
+                return True
+            for event in body["changes"]:
+                self._apply(event)
+            self.cursor = body["cursor"]
+            return bool(body["changes"])
@@ -1,75 +1,318 @@
 # RESTserver/server.py
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, g
 from flask_cors import CORS
 import json
+import copy
 import os
-import bcrypt
+import pickle
+import sys
+import time
+
+# Use absolute path to avoid path issues
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Share storage and lookup index with the zc_cdc UI package
+os.environ.setdefault("CDC_DATA_DIR", os.path.join(BASE_DIR, 'data'))
+sys.path.insert(0, BASE_DIR)
+from zc_cdc import data_utils
+from zc_cdc.filelock import lock_stats
+from zc_cdc.id_alloc import IdPool
+import listing
+from server_state import ServerState
+from change_feed import ChangeFeed, sse_stream
+from metrics import Registry, Counter, Histogram, Gauge, SIZE_BUCKETS
+from idempotency import IdempotencyStore, idempotent
+from jobs import JobManager
+from singleflight import SingleFlight, ResponseCache
+from encoding import negotiate_encoding, encode_chunks
+from session_tokens import (PasswordVerifier, LoginBusy, issue_token, verify_token,
+                            bearer_token, SESSION_TTL)
 
 app = Flask(__name__)
 CORS(app)
 
+# ---- METRICS ----
+# Exposed in Prometheus text format on GET /metrics. Request metrics are
+# labelled by route rule (not raw path) so the series count stays fixed.
+registry = Registry()
+http_requests = registry.register(Counter(
+    "cdc_http_requests_total", "HTTP requests handled.", ("route", "method", "status")))
+http_latency = registry.register(Histogram(
+    "cdc_http_request_duration_seconds", "Time to produce the response.", ("route", "method")))
+http_request_size = registry.register(Histogram(
+    "cdc_http_request_size_bytes", "Request body size.", ("route",), SIZE_BUCKETS))
+http_response_size = registry.register(Histogram(
+    "cdc_http_response_size_bytes", "Response body size as sent (after compression).", ("route",), SIZE_BUCKETS))
+flush_latency = registry.register(Histogram(
+    "cdc_state_flush_duration_seconds", "Time to persist one document from memory.", ("doc",)))
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    start = g.get("request_start")
+    if start is None:
+        return response
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    http_requests.inc(route, request.method, str(response.status_code))
+    http_latency.observe(time.perf_counter() - start, route, request.method)
+    if request.content_length:
+        http_request_size.observe(request.content_length, route)
+    if response.content_length is not None:
+        http_response_size.observe(response.content_length, route)
+    return response
+
 with open("data/login_credentials.json", "r") as f:
     credentials = json.load(f)
 
+# Login checks the password with bcrypt on a bounded pool and returns a
+# signed session token; API clients then send "Authorization: Bearer
+# <token>", which costs one HMAC. Set CDC_REQUIRE_SESSION=1 to reject
+# /cdc/api/ requests without a valid token.
+password_verifier = PasswordVerifier(credentials)
+REQUIRE_SESSION = os.environ.get("CDC_REQUIRE_SESSION", "0") == "1"
+
 @app.route("/login", methods=["POST"])
 def login():
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     username = data.get("username")
     password = data.get("password")
 
-    if username in credentials:
-        hashed_pw = credentials[username].encode()
-        if bcrypt.checkpw(password.encode(), hashed_pw):
-            return jsonify({"success": True, "message": "Login successful"}), 200
+    try:
+        valid = password_verifier.verify(username, password)
+    except LoginBusy:
+        return jsonify({"success": False, "message": "Too many login attempts, retry shortly"}), 503, {"Retry-After": "1"}
+    if valid:
+        return jsonify({
+            "success": True,
+            "message": "Login successful",
+            "token": issue_token(username),
+            "expires_in": SESSION_TTL
+        }), 200
 
     return jsonify({"success": False, "message": "Invalid credentials"}), 401
 
+@app.before_request
+def require_session():
+    if REQUIRE_SESSION and request.path.startswith("/cdc/api/") and request.method != "OPTIONS":
+        token = bearer_token(request.headers)
+        if not token or verify_token(token) is None:
+            return jsonify({"error": "Valid session token required"}), 401
 
-# Use absolute path to avoid path issues
-BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-PERSISTENCE_FILE = os.path.join(BASE_DIR, 'data', 'zones_data.json')
 
-# Load data from file
-def load_data():
-    if not os.path.exists(PERSISTENCE_FILE):
-        return {"active_zones": {}, "inactive_zones": {}}
-    with open(PERSISTENCE_FILE, 'r') as f:
-        try:
-            return json.load(f)
-        except json.JSONDecodeError:
-            return {"active_zones": {}, "inactive_zones": {}}
-
-# Save data to file
-def save_data(data):
-    os.makedirs(os.path.dirname(PERSISTENCE_FILE), exist_ok=True)
-    with open(PERSISTENCE_FILE, 'w') as f:
-        json.dump(data, f, indent=4)
-# save data to zonegroup_data.json
-def load_zonegroup():
-    try:
-        with open("data/zonegroup_data.json", "r") as file:
-            return json.load(file)
-    except (json.JSONDecodeError, FileNotFoundError):
-        return {"zone_groups": {}}
-def save_zonegroup(zonegroup_data):
-    with open("data/zonegroup_data.json", "w") as file:
-        json.dump(zonegroup_data, file, indent=4)
-
-#alias data
-def load_alias_data():
-    try:
-        with open("data/alias_data.json", "r") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {"member_aliases": {}, "free_aliases": {}}
+# Zones, aliases and zone groups live in `state`: requests read and
+# mutate memory under state.lock, and a background flusher writes the
+# files shortly after (see server_state.py). Lookups use state.index.
+# Every committed change is also published on `feed` (see change_feed.py).
+feed = ChangeFeed()
+DOC_ENTITIES = {"zones": "zone", "alias": "alias", "zonegroup": "zone_group"}
+
+def publish_reload(doc, revision):
+    feed.publish(doc, revision, [{"entity": DOC_ENTITIES[doc], "op": "reload"}])
+
+state = ServerState(on_reload=publish_reload, on_flush=lambda doc, seconds: flush_latency.observe(seconds, doc))
+
+registry.register(Gauge(
+    "cdc_file_lock_wait_seconds_total", "Time spent waiting for data file locks.", ("lock",),
+    lambda: {(os.path.basename(path),): wait for path, (_, wait) in lock_stats().items()}, "counter"))
+registry.register(Gauge(
+    "cdc_file_lock_acquisitions_total", "Data file lock acquisitions.", ("lock",),
+    lambda: {(os.path.basename(path),): count for path, (count, _) in lock_stats().items()}, "counter"))
+registry.register(Gauge(
+    "cdc_state_lock_wait_seconds_total", "Time requests spent waiting for the in-memory state lock.", (),
+    lambda: {(): state.lock.wait_seconds}, "counter"))
+registry.register(Gauge(
+    "cdc_state_revision", "Current revision of each document.", ("doc",),
+    lambda: {(doc,): rev for doc, rev in state.revisions.items()}))
+registry.register(Gauge(
+    "cdc_state_dirty_documents", "Documents with changes not yet written to disk.", (),
+    lambda: {(): state.pending()}))
+registry.register(Gauge(
+    "cdc_change_feed_sequence", "Sequence number of the last published change.", (),
+    lambda: {(): feed.seq}))
+
+registry.register(Gauge(
+    "cdc_response_cache", "Serialized GET response cache.", ("stat",),
+    lambda: {(k,): v for k, v in response_cache.stats().items()}))
+registry.register(Gauge(
+    "cdc_coalesced_gets_total", "GETs that shared another request's serialization.", (),
+    lambda: {(): get_flights.shared}, "counter"))
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+# A client may send If-Match: <revision> to make its write conditional;
+# a stale revision gets 412 instead of overwriting newer data.
+# Successful writes return the new revision in X-CDC-Revision.
+def if_match_revision():
+    value = request.headers.get("If-Match", "").strip().strip('"')
+    return int(value) if value.isdigit() else None
+
+def check_revision(doc):
+    expected = if_match_revision()
+    if expected is not None:
+        current = state.revision(doc)
+        if expected != current:
+            raise data_utils.ConflictError(doc, expected, current)
+
+def revision_header(revision):
+    return {"X-CDC-Revision": str(revision)}
+
+# GETs carry ETag: W/"<doc>-<revision>". A client that sends it back in
+# If-None-Match gets 304 Not Modified, without the body being serialized,
+# for as long as the document is unchanged.
+def revision_etag(doc, revision):
+    return f'W/"{doc}-{revision}"'
+
+def etag_matches(etag):
+    tags = [t.strip() for t in request.headers.get("If-None-Match", "").split(",")]
+    return "*" in tags or etag in tags or etag[2:] in tags
+
+def not_modified(etag):
+    return "", 304, {"ETag": etag}
+
+@app.errorhandler(data_utils.ConflictError)
+def handle_conflict(e):
+    return jsonify({"error": str(e), "revision": e.actual}), 412
+
+
+# Mutating routes accept an Idempotency-Key header: a retry with the same
+# key (and body) within CDC_IDEMPOTENCY_TTL gets the first response
+# replayed instead of applying the change again.
+idempotency_store = IdempotencyStore()
+registry.register(Gauge(
+    "cdc_idempotent_replays_total", "Responses replayed for a repeated Idempotency-Key.", (),
+    lambda: {(): idempotency_store.replays}, "counter"))
+
+# ---- OPERATIONS ----
+# Each create/delete is a function (doc data, index, operation) that
+# mutates the in-memory document and index, returning (status, message,
+# change) where change is the change feed event body, or raising
+# OperationError. Create events carry the new object and its section so
+# that replicas (GET /changes) can apply them without re-fetching. The
+# single-object routes and the batch endpoints share them.
+#
+# New IDs come from `id_pool`, which reserves them from the shared
+# sequence file in blocks. Callers reserve enough for the request with
+# reserve_ids() before taking state.lock, so creates do no disk I/O
+# under the lock.
+id_pool = IdPool(data_utils.reserve_ids)
+
+def reserve_ids(doc, operations):
+    creates = sum(1 for o in operations if isinstance(o, dict) and o.get("op") == "create")
+    if creates:
+        id_pool.ensure(DOC_ENTITIES[doc], creates)
+
+class OperationError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def change(entity, obj_id, name, op, section=None, value=None):
+    event = {"entity": entity, "id": obj_id, "name": name, "op": op}
+    if section is not None:
+        event["section"] = section
+        event["value"] = copy.deepcopy(value)
+    return event
+
+def create_zone_op(zones, index, operation):
+    name = operation["name"]
+    if index.zone_id(name) is not None:
+        raise OperationError(400, f"Zone '{name}' already exists")
+    zone_id = id_pool.take("zone")
+    zones["inactive_zones"][zone_id] = {"name": name, "aliases": {}}
+    index.add_zone(zone_id, zones["inactive_zones"][zone_id])
+    return 201, f"Zone '{name}' created successfully", change("zone", zone_id, name, "create", "inactive_zones", zones["inactive_zones"][zone_id])
+
+def delete_zone_op(zones, index, operation):
+    name = operation["name"]
+    zone_id = index.zone_id(name)
+    for zone_dict in [zones["active_zones"], zones["inactive_zones"]]:
+        if zone_id in zone_dict:
+            del zone_dict[zone_id]
+            index.remove_zone(zone_id)
+            return 200, f"Zone '{name}' deleted successfully", change("zone", zone_id, name, "delete")
+    raise OperationError(404, f"Zone '{name}' not found")
+
+def create_alias_op(aliases, index, operation):
+    name = operation["name"]
+    if index.alias_id(name) is not None:
+        raise OperationError(400, f"Alias '{name}' already exists")
+    alias_id = id_pool.take("alias")
+    alias_obj = {
+        "name": name,
+        "type": operation.get("type", "Host-Port"),
+        "ip": operation.get("ip", ""),
+        "nqn": operation.get("nqn", "")
+    }
+    aliases["free_aliases"][alias_id] = alias_obj
+    index.add_alias(alias_id, alias_obj)
+    return 201, f"Alias '{name}' created", change("alias", alias_id, name, "create", "free_aliases", alias_obj)
+
+def delete_alias_op(aliases, index, operation):
+    name = operation["name"]
+    alias_id = index.alias_id(name)
+    for section in ["free_aliases", "member_aliases"]:
+        alias_obj = aliases[section].get(alias_id)
+        if alias_obj and alias_obj["name"] == name:
+            del aliases[section][alias_id]
+            index.remove_alias(alias_id, alias_obj)
+            return 200, f"Alias '{name}' deleted", change("alias", alias_id, name, "delete")
+    raise OperationError(404, f"Alias '{name}' not found")
+
+def create_zgrp_op(groups, index, operation):
+    name = operation["name"]
+    if index.group_id(name) is not None:
+        raise OperationError(400, f"Zone Group '{name}' already exists")
+    group_id = id_pool.take("zone_group")
+    groups["zone_groups"][group_id] = {
+        "name": name,
+        "zones": [],
+        "active": False
+    }
+    index.add_group(group_id, groups["zone_groups"][group_id])
+    return 201, f"Zone Group '{name}' created successfully", change("zone_group", group_id, name, "create", "zone_groups", groups["zone_groups"][group_id])
+
+def delete_zgrp_op(groups, index, operation):
+    name = operation["name"]
+    group_id = index.group_id(name)
+    if group_id in groups["zone_groups"]:
+        del groups["zone_groups"][group_id]
+        index.remove_group(group_id)
+        return 200, f"Zone Group '{name}' deleted successfully", change("zone_group", group_id, name, "delete")
+    raise OperationError(404, f"Zone Group '{name}' not found")
+
+OPERATIONS = {
+    "zones": {"create": create_zone_op, "delete": delete_zone_op},
+    "alias": {"create": create_alias_op, "delete": delete_alias_op},
+    "zonegroup": {"create": create_zgrp_op, "delete": delete_zgrp_op},
+}
+
+def json_object_body():
+    """The request's JSON body as a dict ({} if absent), or None if it is not an object."""
+    body = request.get_json(silent=True)
+    if body is None:
+        return {}
+    return body if isinstance(body, dict) else None
 
-# Save data to file
-def save_alias_data(alias_data):
-    with open("data/alias_data.json", "w") as file:
-        json.dump(alias_data, file, indent=4)
+def not_an_object():
+    return jsonify({"error": "Request body must be a JSON object"}), 400
+
+def run_operation(doc, op, operation):
+    reserve_ids(doc, [dict(operation, op=op)])
+    with state.lock:
+        check_revision(doc)
+        try:
+            status, message, event = OPERATIONS[doc][op](state.docs[doc], state.index, operation)
+        except OperationError as e:
+            return jsonify({"error": str(e)}), e.status
+        revision = state.commit(doc)
+        feed.publish(doc, revision, [event])
+    return jsonify({"message": message, "id": event["id"]}), status, revision_header(revision)
 
-# Load on startup
-data = load_data()
 
 # Endpoint to fetch NVMe nodes
 # @app.route("/cdc/api/v1/nvmenodes", methods=["GET"])
@@ -78,109 +321,324 @@ data = load_data()
 
 # Endpoint to create Zone Group
 @app.route("/cdc/api/v1/zgrp/<zgrp_name>", methods=["POST"])
+@idempotent(idempotency_store)
 def create_zgrp(zgrp_name):
-    data = load_zonegroup()
-    if any(g["name"] == zgrp_name for g in data["zone_groups"].values()):
-        return jsonify({"error": f"Zone Group '{zgrp_name}' already exists"}), 400
-
-    new_id = str(max([int(i) for i in data["zone_groups"].keys()] + [0]) + 1)
-    data["zone_groups"][new_id] = {
-        "name": zgrp_name,
-        "zones": [],
-        "active": False
-    }
-    save_zonegroup(data)
-    return jsonify({"message": f"Zone Group '{zgrp_name}' created successfully"}), 201
+    return run_operation("zonegroup", "create", {"name": zgrp_name})
 
 
 @app.route("/cdc/api/v1/zgrp/<zgrp_name>", methods=["DELETE"])
+@idempotent(idempotency_store)
 def delete_zgrp(zgrp_name):
-    data = load_zonegroup()
-    group_id_to_delete = None
-    for gid, group in data["zone_groups"].items():
-        if group["name"] == zgrp_name:
-            group_id_to_delete = gid
-            break
-    if group_id_to_delete:
-        del data["zone_groups"][group_id_to_delete]
-        save_zonegroup(data)
-        return jsonify({"message": f"Zone Group '{zgrp_name}' deleted successfully"}), 200
-    return jsonify({"error": f"Zone Group '{zgrp_name}' not found"}), 404
+    return run_operation("zonegroup", "delete", {"name": zgrp_name})
+
+# GET /cdc/api/v1/zones and /aliases accept limit, cursor, prefix (name
+# prefix), type and fields (comma-separated projection). With any of them
+# the response is a page {"items", "count", "next_cursor"} in name order;
+# without them the full document is returned as before.
+@app.errorhandler(listing.ListingError)
+def handle_listing_error(e):
+    return jsonify({"error": str(e)}), 400
+
+zones_listing = listing.NameListing(("active_zones", "inactive_zones"))
+alias_listing = listing.NameListing(("member_aliases", "free_aliases"))
+
+def zone_matches_type(section, zone, zone_type):
+    # Zones are typed by state: "active" or "inactive".
+    return section == f"{zone_type.lower()}_zones"
+
+def alias_matches_type(section, alias, alias_type):
+    return alias.get("type", "").lower() == alias_type.lower()
+
+# Serialized GET bodies are cached per (doc, revision, query string,
+# content encoding), and concurrent identical GETs that miss share one
+# serialization. Bodies are JSON-encoded incrementally and gzip/deflate
+# compressed as they are produced when the client accepts it (see
+# encoding.py). The encoded body is buffered, not streamed: it is what
+# the cache stores and what Content-Length is computed from.
+get_flights = SingleFlight()
+response_cache = ResponseCache()
+
+def serialize_document(doc, doc_listing, matches_type, shape, params, encoding):
+    # The documents are live: snapshot the body under the lock (a pickle
+    # round trip is far cheaper than JSON encoding and compression), then
+    # encode the snapshot without holding up writers.
+    with state.lock:
+        revision = state.revisions[doc]
+        if params is not None:
+            body = listing.page(doc_listing, revision, state.docs[doc], params, matches_type)
+        else:
+            body = shape(state.docs[doc])
+        body = pickle.loads(pickle.dumps(body, pickle.HIGHEST_PROTOCOL))
+        # The feed position matching this body, for GET /changes?since=
+        cursor = feed.cursor(feed.seq)
+    chunks, used_encoding, size = encode_chunks(body, encoding)
+    entry = (revision, cursor, chunks, used_encoding, size)
+    response_cache.put((doc, revision, request.query_string, encoding), entry, size)
+    return entry
+
+def get_document(doc, doc_listing, matches_type, shape):
+    params = listing.parse_args(request.args)
+    encoding = negotiate_encoding(request.headers.get("Accept-Encoding"))
+    revision = state.revision(doc)
+    etag = revision_etag(doc, revision)
+    if etag_matches(etag):
+        return not_modified(etag)
+    key = (doc, revision, request.query_string, encoding)
+    entry = response_cache.get(key)
+    if entry is None:
+        entry = get_flights.do(key, lambda: serialize_document(doc, doc_listing, matches_type, shape, params, encoding))
+    revision, cursor, chunks, used_encoding, size = entry
+    headers = dict(revision_header(revision), ETag=revision_etag(doc, revision))
+    headers["X-CDC-Change-Cursor"] = cursor
+    headers["Content-Length"] = str(size)
+    headers["Vary"] = "Accept-Encoding"
+    if used_encoding:
+        headers["Content-Encoding"] = used_encoding
+    return Response(iter(chunks), 200, headers, mimetype="application/json")
 
 # Endpoint to create Zone
 @app.route("/cdc/api/v1/zones", methods=["GET"])
 def get_zones():
-    return jsonify({
+    return get_document("zones", zones_listing, zone_matches_type, lambda data: {
         "active_zones": data.get("active_zones", {}),
         "inactive_zones": data.get("inactive_zones", {})
-    }), 200
+    })
 
 
 @app.route("/cdc/api/v1/zone/<zone_name>", methods=["POST"])
+@idempotent(idempotency_store)
 def create_zone(zone_name):
-    try:
-        all_zone_names = [z["name"] for z in data["active_zones"].values()] + \
-                         [z["name"] for z in data["inactive_zones"].values()]
-        if zone_name in all_zone_names:
-            return jsonify({"error": f"Zone '{zone_name}' already exists"}), 400
-
-        all_ids = list(data["active_zones"].keys()) + list(data["inactive_zones"].keys())
-        next_id = str(max([int(i) for i in all_ids] + [0]) + 1)
-
-        data["inactive_zones"][next_id] = {"name": zone_name, "aliases": {}}
-        save_data(data)
-        return jsonify({"message": f"Zone '{zone_name}' created successfully"}), 201
-    except Exception:
-        return jsonify({"error": "Internal server error"}), 500
+    return run_operation("zones", "create", {"name": zone_name})
 
 @app.route("/cdc/api/v1/zone/<zone_name>", methods=["DELETE"])
+@idempotent(idempotency_store)
 def delete_zone(zone_name):
-    try:
-        for zone_dict in [data["active_zones"], data["inactive_zones"]]:
-            for zone_id, zone in list(zone_dict.items()):
-                if zone["name"] == zone_name:
-                    del zone_dict[zone_id]
-                    save_data(data)
-                    return jsonify({"message": f"Zone '{zone_name}' deleted successfully"}), 200
-        return jsonify({"error": f"Zone '{zone_name}' not found"}), 404
-    except Exception:
-        return jsonify({"error": "Internal server error"}), 500
+    return run_operation("zones", "delete", {"name": zone_name})
 
 @app.route("/cdc/api/v1/aliases", methods=["GET"])
 def get_aliases():
-    data = load_alias_data()
-    return jsonify(data), 200
+    return get_document("alias", alias_listing, alias_matches_type, lambda data: data)
 
 # ✅ POST: Create a new alias
 @app.route("/cdc/api/v1/alias/<alias_name>", methods=["POST"])
+@idempotent(idempotency_store)
 def create_alias(alias_name):
-    data = load_alias_data()
-
-    if alias_name in [a["name"] for a in data["free_aliases"].values()] + [a["name"] for a in data["member_aliases"].values()]:
-        return jsonify({"error": f"Alias '{alias_name}' already exists"}), 400
-
-    new_id = str(max([int(i) for i in data["free_aliases"].keys() + data["member_aliases"].keys()] + [0]) + 1)
-    alias_obj = {
-        "name": alias_name,
-        "type": request.json.get("type", "Host-Port"),
-        "ip": request.json.get("ip", ""),
-        "nqn": request.json.get("nqn", "")
-    }
-    data["free_aliases"][new_id] = alias_obj
-    save_alias_data(data)
-    return jsonify({"message": f"Alias '{alias_name}' created"}), 201
+    body = json_object_body()
+    if body is None:
+        return not_an_object()
+    return run_operation("alias", "create", dict(body, name=alias_name))
 
 # ✅ DELETE: Remove alias
 @app.route("/cdc/api/v1/alias/<alias_name>", methods=["DELETE"])
+@idempotent(idempotency_store)
 def delete_alias(alias_name):
-    data = load_alias_data()
-    for section in ["free_aliases", "member_aliases"]:
-        for alias_id, alias_obj in list(data[section].items()):
-            if alias_obj["name"] == alias_name:
-                del data[section][alias_id]
-                save_alias_data(data)
-                return jsonify({"message": f"Alias '{alias_name}' deleted"}), 200
-    return jsonify({"error": f"Alias '{alias_name}' not found"}), 404
+    return run_operation("alias", "delete", {"name": alias_name})
+
+
+# ---- BATCH MUTATIONS ----
+# POST /cdc/api/v1/zones/batch, /cdc/api/v1/aliases/batch, /cdc/api/v1/zgrps/batch
+#   {"operations": [{"op": "create" | "delete", "name": "...", ...}, ...],
+#    "atomic": true}
+# The operations are applied in order under the state lock and committed
+# as one change, so they reach disk in a single write. With "atomic" (the
+# default) one failed item rolls the whole batch back, and the items that
+# had succeeded are reported as 409 "rolled_back"; otherwise they are kept.
+# The response has one result per operation.
+MAX_BATCH_OPERATIONS = 10000
+
+def parse_operations(body, limit):
+    """The "operations" list of a batch or job body, or an error response."""
+    operations = body.get("operations")
+    if not isinstance(operations, list) or not operations:
+        return None, (jsonify({"error": "Request body needs a non-empty 'operations' list"}), 400)
+    if len(operations) > limit:
+        return None, (jsonify({"error": f"At most {limit} operations per request"}), 413)
+    return operations, None
+
+def apply_operations(doc, operations, first_index=0):
+    """Apply `operations` to state.docs[doc]; call with state.lock held.
+
+    Returns (results, changes, failed) without committing.
+    """
+    handlers = OPERATIONS[doc]
+    results = []
+    changes = []
+    failed = 0
+    for position, operation in enumerate(operations, start=first_index):
+        op = operation.get("op") if isinstance(operation, dict) else None
+        name = operation.get("name") if isinstance(operation, dict) else None
+        result = {"index": position, "op": op, "name": name}
+        try:
+            if op not in handlers or not isinstance(name, str) or not name:
+                raise OperationError(400, "Each operation needs 'op' (create or delete) and a 'name'")
+            result["status"], result["message"], event = handlers[op](state.docs[doc], state.index, operation)
+            changes.append(event)
+        except OperationError as e:
+            failed += 1
+            result["status"], result["error"] = e.status, str(e)
+        results.append(result)
+    return results, changes, failed
+
+def run_batch(doc):
+    body = json_object_body()
+    if body is None:
+        return not_an_object()
+    operations, error = parse_operations(body, MAX_BATCH_OPERATIONS)
+    if error:
+        return error
+    atomic = body.get("atomic", True)
+    if not isinstance(atomic, bool):
+        return jsonify({"error": "'atomic' must be true or false"}), 400
+
+    reserve_ids(doc, operations)
+    with state.lock:
+        check_revision(doc)
+        if atomic:
+            before = pickle.dumps(state.docs[doc], pickle.HIGHEST_PROTOCOL)
+        results, changes, failed = apply_operations(doc, operations)
+        applied = len(operations) - failed
+        if failed and atomic:
+            if applied:
+                state.docs[doc] = pickle.loads(before)
+                state.reindex(doc)
+                # The items that succeeded were undone with the rest.
+                for result in results:
+                    if "error" not in result:
+                        result["status"] = 409
+                        result["error"] = "Not applied: batch rolled back"
+                        result["rolled_back"] = True
+                        del result["message"]
+            return jsonify({"applied": 0, "failed": failed, "results": results}), 400
+        if applied:
+            revision = state.commit(doc)
+            feed.publish(doc, revision, changes)
+        else:
+            revision = state.revisions[doc]
+    status = 207 if failed else 200
+    return jsonify({"applied": applied, "failed": failed, "results": results}), status, revision_header(revision)
+
+@app.route("/cdc/api/v1/zones/batch", methods=["POST"])
+@idempotent(idempotency_store)
+def batch_zones():
+    return run_batch("zones")
+
+@app.route("/cdc/api/v1/aliases/batch", methods=["POST"])
+@idempotent(idempotency_store)
+def batch_aliases():
+    return run_batch("alias")
+
+@app.route("/cdc/api/v1/zgrps/batch", methods=["POST"])
+@idempotent(idempotency_store)
+def batch_zgrps():
+    return run_batch("zonegroup")
+
+# ---- JOBS ----
+# POST /cdc/api/v1/jobs  {"type": "batch", "doc": "zones" | "alias" | "zonegroup",
+#                         "operations": [...same as the batch endpoints...]}
+#   -> 202 {"job_id", "status_url"} at once; the work runs on the job pool.
+# GET /cdc/api/v1/jobs/<id>?offset=&limit= -> status, progress and a page
+# of per-item results. GET /cdc/api/v1/jobs lists recent jobs.
+# Batch jobs are not atomic: they commit every JOB_CHUNK_SIZE operations,
+# so the state lock is never held for long and progress is visible. At
+# shutdown queued jobs are cancelled and running ones stop between chunks.
+MAX_JOB_OPERATIONS = 200000
+JOB_CHUNK_SIZE = 200
+JOB_RESULTS_PAGE = 1000
+JOB_DOCS = {"zones", "alias", "zonegroup"}
+
+job_manager = JobManager()
+
+def jobs_by_status():
+    counts = {}
+    for job in job_manager.list():
+        counts[(job.status,)] = counts.get((job.status,), 0) + 1
+    return counts
+
+registry.register(Gauge("cdc_jobs", "Known jobs by status.", ("status",), jobs_by_status))
+
+def batch_job(doc, operations):
+    def work(job):
+        for start in range(0, len(operations), JOB_CHUNK_SIZE):
+            if job.cancel_requested:
+                return   # chunks already applied stay committed
+            chunk = operations[start:start + JOB_CHUNK_SIZE]
+            reserve_ids(doc, chunk)
+            with state.lock:
+                results, changes, failed = apply_operations(doc, chunk, first_index=start)
+                if changes:
+                    revision = state.commit(doc)
+                    feed.publish(doc, revision, changes)
+            job.record(results, failed)
+    return work
+
+@app.route("/cdc/api/v1/jobs", methods=["POST"])
+@idempotent(idempotency_store)
+def submit_job():
+    body = json_object_body()
+    if body is None:
+        return not_an_object()
+    if body.get("type") != "batch" or body.get("doc") not in JOB_DOCS:
+        return jsonify({"error": "Job needs type 'batch' and doc 'zones', 'alias' or 'zonegroup'"}), 400
+    operations, error = parse_operations(body, MAX_JOB_OPERATIONS)
+    if error:
+        return error
+    job = job_manager.submit(f"batch:{body['doc']}", len(operations), batch_job(body["doc"], operations))
+    status_url = f"/cdc/api/v1/jobs/{job.id}"
+    return jsonify({"job_id": job.id, "status_url": status_url}), 202, {"Location": status_url}
+
+@app.route("/cdc/api/v1/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Job '{job_id}' not found"}), 404
+    try:
+        offset = max(int(request.args.get("offset", 0)), 0)
+        limit = min(max(int(request.args.get("limit", JOB_RESULTS_PAGE)), 1), JOB_RESULTS_PAGE)
+    except ValueError:
+        return jsonify({"error": "offset and limit must be integers"}), 400
+    return jsonify(job.to_dict(offset, limit)), 200
+
+@app.route("/cdc/api/v1/jobs", methods=["GET"])
+def list_jobs():
+    return jsonify({"jobs": [job.to_dict(limit=0) for job in job_manager.list()]}), 200
+
+# ---- CHANGE STREAM ----
+# GET /cdc/api/v1/events: Server-Sent Events, one "change" event per
+# created/deleted zone, alias or zone group:
+#   data: {"seq", "entity", "id", "name", "op", "doc", "revision"}
+# Reconnecting clients send Last-Event-ID and resume where they left off;
+# if that is too old they get a "resync" event and should re-fetch.
+@app.route("/cdc/api/v1/events", methods=["GET"])
+def events():
+    last_event_id = request.headers.get("Last-Event-ID")
+    last_seq = feed.parse_cursor(last_event_id) if last_event_id else feed.seq
+    return Response(sse_stream(feed, last_seq), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# GET /cdc/api/v1/changes?since=<cursor>[&wait=<seconds>]
+# Catch-up for replicas: the events after `since` (a cursor from an
+# earlier /changes response, an event id, or the X-CDC-Change-Cursor
+# header of a full GET), and the cursor to use next time. If they are
+# no longer all in the ring, {"resync_required": true} tells the client
+# to re-fetch the documents. With wait=, an empty answer is held up to
+# that many seconds (max 30) until something changes.
+MAX_CHANGES_WAIT = 30
+
+@app.route("/cdc/api/v1/changes", methods=["GET"])
+def changes():
+    since = feed.parse_cursor(request.args.get("since"))
+    try:
+        wait = min(float(request.args.get("wait", 0)), MAX_CHANGES_WAIT)
+    except ValueError:
+        return jsonify({"error": "wait must be a number of seconds"}), 400
+    events = feed.wait(since, wait) if wait > 0 else feed.since(since)
+    if events is None:
+        with state.lock:
+            revisions = dict(state.revisions)
+            cursor = feed.cursor(feed.seq)
+        return jsonify({"resync_required": True, "cursor": cursor, "revisions": revisions}), 200
+    cursor = feed.cursor(events[-1]["seq"] if events else since)
+    return jsonify({"resync_required": False, "cursor": cursor, "changes": events}), 200
 
 if __name__ == "__main__":
     app.run(host='0.0.0.0', port=5001, debug=True)
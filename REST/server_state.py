@@ -0,0 +1,242 @@
+# REST/server_state.py
+import atexit
+import os
+import pickle
+import threading
+import time
+
+from zc_cdc import data_utils
+from zc_cdc.index import ZoneIndex
+from zc_cdc.documents import diff_records, apply_record
+
+DOCS = ("zones", "alias", "zonegroup")
+
+FLUSH_DELAY = float(os.environ.get("CDC_FLUSH_DELAY", "0.2"))
+POLL_INTERVAL = float(os.environ.get("CDC_POLL_INTERVAL", "1.0"))
+
+
+def _copy(data):
+    return pickle.loads(pickle.dumps(data, pickle.HIGHEST_PROTOCOL))
+
+
+def _name_taken(data, record):
+    """True if another row of `data` already has the name `record` would put."""
+    name = record["value"].get("name") if isinstance(record["value"], dict) else None
+    if name is None:
+        return False
+    for section, rows in data.items():
+        if not isinstance(rows, dict):
+            continue
+        for key, row in rows.items():
+            if key != record["key"] and isinstance(row, dict) and row.get("name") == name:
+                return True
+    return False
+
+
+class TimedRLock:
+    """threading.RLock that accumulates the time callers spent waiting for it."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.acquisitions = 0
+        self.wait_seconds = 0.0
+
+    def acquire(self):
+        if self._lock.acquire(blocking=False):
+            self.acquisitions += 1
+            return True
+        start = time.perf_counter()
+        self._lock.acquire()
+        self.acquisitions += 1
+        self.wait_seconds += time.perf_counter() - start
+        return True
+
+    def release(self):
+        self._lock.release()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class ServerState:
+    """Authoritative in-memory zones, aliases and zone groups for the REST server.
+
+    Requests read and mutate `docs` under `lock` and call commit(doc),
+    which bumps the document's revision and schedules a flush; nothing is
+    written on the request path. A flusher thread persists every dirty
+    document at most `flush_delay` seconds after its first unflushed
+    change, so bursts of mutations coalesce into one write. Pending
+    changes are flushed by close(), which also runs at interpreter exit.
+
+    Other writers (the Streamlit UI) may still save the files. A clean
+    document changed on disk is reloaded within `poll_interval`; a dirty
+    one is merged on flush by replaying our row changes over theirs.
+    Either way on_reload(doc, revision) is called, as the change is not
+    described by any commit(). on_flush(doc, seconds) is called after
+    every write.
+    """
+
+    def __init__(self, flush_delay=FLUSH_DELAY, poll_interval=POLL_INTERVAL,
+                 on_reload=None, on_flush=None):
+        self.flush_delay = flush_delay
+        self.poll_interval = poll_interval
+        self.on_reload = on_reload
+        self.on_flush = on_flush
+        self.lock = TimedRLock()
+        self.docs = {}
+        self.revisions = {}
+        self.index = ZoneIndex()
+        self._base = {}             # doc -> copy of what is on disk
+        self._base_revisions = {}   # doc -> revision of that copy
+        self._dirty_since = {}      # doc -> time of first unflushed change
+        for doc in DOCS:
+            self._reload(doc, notify=False)
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="state-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    # ---- REQUEST SIDE ----
+    def revision(self, doc):
+        with self.lock:
+            return self.revisions[doc]
+
+    def commit(self, doc):
+        """Record a mutation of docs[doc]; call with `lock` held. Returns the new revision."""
+        self.revisions[doc] += 1
+        self._dirty_since.setdefault(doc, time.monotonic())
+        self._wake.set()
+        return self.revisions[doc]
+
+    def reindex(self, doc):
+        {
+            "zones": self.index.index_zones,
+            "alias": self.index.index_aliases,
+            "zonegroup": self.index.index_zonegroups,
+        }[doc](self.docs[doc])
+
+    # ---- PERSISTENCE ----
+    def _reload(self, doc, notify=True):
+        data, revision = data_utils.load_versioned(doc)
+        with self.lock:
+            if doc in self._dirty_since:
+                return   # unflushed changes win; merged on flush
+            self.docs[doc] = data
+            self.revisions[doc] = revision
+            self._base[doc] = _copy(data)
+            self._base_revisions[doc] = revision
+            self.reindex(doc)
+            if notify and self.on_reload:
+                self.on_reload(doc, revision)
+
+    def flush(self, doc):
+        start = time.perf_counter()
+        with self.lock:
+            if doc not in self._dirty_since:
+                return
+        with data_utils.locked(doc):
+            disk_revision = data_utils.get_revision(doc)
+            with self.lock:
+                if doc not in self._dirty_since:
+                    return
+                if disk_revision != self._base_revisions[doc]:
+                    # Saved by someone else since our last sync. Rare, so
+                    # the merge holds the state lock throughout: no request
+                    # can commit on top of the pre-merge document meanwhile.
+                    self._merge(doc)
+                    merged = True
+                else:
+                    ours = _copy(self.docs[doc])
+                    revision = self.revisions[doc]
+                    del self._dirty_since[doc]
+                    merged = False
+
+            if not merged:
+                try:
+                    # The disk revision is our base, below `revision`, so
+                    # the file gets exactly the revision memory handed out.
+                    saved_revision = data_utils.save_document(doc, ours, revision=revision)
+                except Exception:
+                    with self.lock:
+                        self._dirty_since.setdefault(doc, time.monotonic())
+                    raise
+                with self.lock:
+                    self.revisions[doc] = max(self.revisions[doc], saved_revision)
+                    self._base[doc] = ours
+                    self._base_revisions[doc] = saved_revision
+        if self.on_flush:
+            self.on_flush(doc, time.perf_counter() - start)
+
+    def _merge(self, doc):
+        """Replay our row changes over the newer document on disk and save the
+        result; call with locked(doc) and `lock` held.
+
+        A put that would give a second row the name of an existing one
+        (e.g. the same zone created here and by the other writer) is
+        dropped. The merged document gets a revision above both ours and
+        the one on disk, and memory takes exactly what was saved.
+        """
+        to_save = data_utils.load_versioned(doc)[0]
+        for record in diff_records(doc, self._base[doc], self.docs[doc]):
+            if record["op"] == "put" and _name_taken(to_save, record):
+                continue
+            to_save = apply_record(to_save, record)
+        saved_revision = data_utils.save_document(doc, to_save, revision=self.revisions[doc] + 1)
+        del self._dirty_since[doc]
+        self.docs[doc] = to_save
+        self.revisions[doc] = saved_revision
+        self._base[doc] = _copy(to_save)
+        self._base_revisions[doc] = saved_revision
+        self.reindex(doc)
+        if self.on_reload:
+            self.on_reload(doc, saved_revision)
+
+    def pending(self):
+        """Number of documents with unflushed changes."""
+        with self.lock:
+            return len(self._dirty_since)
+
+    def flush_all(self):
+        for doc in DOCS:
+            try:
+                self.flush(doc)
+            except Exception as e:
+                print(f"Flushing {doc} failed: {e}")
+
+    def _flush_loop(self):
+        last_poll = time.monotonic()
+        while not self._stop.is_set():
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            with self.lock:
+                pending = list(self._dirty_since.values())
+            if pending:
+                # Bounded delay: measured from the oldest unflushed change,
+                # so a steady stream of writes cannot postpone the flush.
+                delay = min(pending) + self.flush_delay - time.monotonic()
+                if delay > 0 and self._stop.wait(delay):
+                    break   # close() flushes
+                self.flush_all()
+            if time.monotonic() - last_poll >= self.poll_interval:
+                last_poll = time.monotonic()
+                for doc in DOCS:
+                    # A bad file or a failing on_reload must not end the
+                    # thread: nothing would be persisted until exit.
+                    try:
+                        if data_utils.get_revision(doc) != self._base_revisions[doc]:
+                            self._reload(doc)
+                    except Exception as e:
+                        print(f"Reloading {doc} failed: {e}")
+
+    def close(self, timeout=5.0):
+        """Stop the flusher thread and flush pending changes."""
+        self._stop.set()
+        self._wake.set()
+        self._flusher.join(timeout)
+        atexit.unregister(self.close)
+        self.flush_all()
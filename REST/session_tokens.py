@@ -0,0 +1,86 @@
+# REST/session_tokens.py
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+# Tokens are "<payload>.<signature>", both base64url; the payload is
+# {"sub": username, "exp": unix time}. Without CDC_SESSION_SECRET a random
+# secret is used, so tokens do not survive a server restart.
+SESSION_SECRET = os.environ.get("CDC_SESSION_SECRET", "").encode() or os.urandom(32)
+SESSION_TTL = int(os.environ.get("CDC_SESSION_TTL", str(8 * 3600)))
+
+LOGIN_WORKERS = int(os.environ.get("CDC_LOGIN_WORKERS", "2"))
+LOGIN_QUEUE = int(os.environ.get("CDC_LOGIN_QUEUE", "16"))
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+def _sign(payload):
+    return hmac.new(SESSION_SECRET, payload.encode(), hashlib.sha256).digest()
+
+
+def issue_token(username, ttl=SESSION_TTL):
+    payload = _b64encode(json.dumps({"sub": username, "exp": int(time.time()) + ttl}).encode())
+    return f"{payload}.{_b64encode(_sign(payload))}"
+
+def verify_token(token):
+    """Return the username of a valid, unexpired token, else None."""
+    try:
+        payload, signature = token.split(".", 1)
+        if not hmac.compare_digest(_b64decode(signature), _sign(payload)):
+            return None
+        claims = json.loads(_b64decode(payload))
+    except (ValueError, TypeError):
+        return None
+    if claims.get("exp", 0) < time.time():
+        return None
+    return claims.get("sub")
+
+def bearer_token(headers):
+    value = headers.get("Authorization", "")
+    if value.startswith("Bearer "):
+        return value[len("Bearer "):].strip()
+    return None
+
+
+class LoginBusy(Exception):
+    """Too many password checks are already queued."""
+
+
+class PasswordVerifier:
+    """bcrypt checks on a small dedicated pool.
+
+    At most `workers` hashes run at once and at most `queue` logins wait,
+    so a burst of login attempts cannot take the CPU (or every request
+    thread) away from the zone API; callers beyond that get LoginBusy.
+    """
+
+    def __init__(self, credentials, workers=LOGIN_WORKERS, queue=LOGIN_QUEUE):
+        self.credentials = credentials
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(workers + queue)
+
+    def _check(self, username, password):
+        hashed_pw = self.credentials.get(username)
+        if hashed_pw is None:
+            return False
+        return bcrypt.checkpw(password.encode(), hashed_pw.encode())
+
+    def verify(self, username, password):
+        if not self._slots.acquire(blocking=False):
+            raise LoginBusy()
+        try:
+            return self._pool.submit(self._check, username, password or "").result()
+        finally:
+            self._slots.release()
@@ -5,16 +5,20 @@ import os
 import plotly.graph_objects as go
 from streamlit_autorefresh import st_autorefresh
 
-
-# Auto-refresh dashboard every 5 seconds
-st_autorefresh(interval=5000, key="dashboard_autorefresh")
-
 # Define file paths
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 ZONE_FILE = os.path.join(BASE_DIR, 'data', 'zone_config.json')
 ENTITY_FILE = os.path.join(BASE_DIR, 'data', 'regd_nodes2.json')
 STORAGE_FILE = os.path.join(BASE_DIR, 'data', 'end_nodes.json')
-ZONEGROUP_FILE = os.path.join(BASE_DIR, 'data', 'zonegroup_data.json')
+
+# Zone groups are read through data_utils; point it at the same data
+# directory, whatever the working directory (set before the import).
+os.environ.setdefault("CDC_DATA_DIR", os.path.join(BASE_DIR, 'data'))
+from zc_cdc.data_utils import snapshot_zonegroup
+
+
+# Auto-refresh dashboard every 5 seconds
+st_autorefresh(interval=5000, key="dashboard_autorefresh")
 
 # Unified JSON file loader
 def load_json_file(filepath):
@@ -32,7 +36,8 @@ def compute_snapshot():
     zone_data = load_json_file(ZONE_FILE)
     regd_data = load_json_file(ENTITY_FILE)
     storage_data = load_json_file(STORAGE_FILE)
-    zonegroup_data = load_json_file(ZONEGROUP_FILE)
+    # Zone groups come from the storage backend, which may not be the JSON file.
+    zonegroup_data = snapshot_zonegroup()
 
     active_zones = []
     for group in zone_data.get("active", []):
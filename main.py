@@ -5,6 +5,7 @@ import time
 import dashboard
 import config_cdc.configure_cdc as configure_cdc
 import zc_cdc.config as config
+from zc_cdc import data_utils
 import requests
 from renderzone import rendertree
 from render_enodes import render_regd_nodes
@@ -40,9 +41,13 @@ def login_ui():
 
                 if response.status_code == 200 and response.json().get("success"):
                     st.session_state.authenticated = True
+                    # Sent as "Authorization: Bearer <token>" to the REST API
+                    st.session_state.session_token = response.json().get("token")
                     st.session_state.login_attempts = 0
                     st.success("✅ Login successful!")
                     st.rerun()
+                elif response.status_code == 503:
+                    st.warning("Login server is busy, please try again in a moment.")
                 else:
                     st.session_state.login_attempts += 1
                     st.error(f"❌ Invalid username or password. Attempt {st.session_state.login_attempts}/3")
@@ -132,28 +137,29 @@ def render_page_content():
             st.title("📄 Cached Zone Configuration")
 
 
-            # File options
+            # File options. Zones, zone groups and aliases are read through
+            # data_utils, as with CDC_STORAGE_BACKEND=sqlite or journal the
+            # JSON files are not (or not immediately) rewritten.
             file_options = {
-                "🧠 Zone Config": "zone_config.json",
-                "📦 Zones": "zones_data.json",
-                "📂 Zone Groups": "zonegroup_data.json",
-                "🔗 Aliases": "alias_data.json"
+                "🧠 Zone Config": lambda: read_json_from_data("zone_config.json"),
+                "📦 Zones": data_utils.load_zones,
+                "📂 Zone Groups": data_utils.load_zonegroup,
+                "🔗 Aliases": data_utils.load_alias
             }
 
             selected_file_label = st.selectbox("Select a file to view", list(file_options.keys()))
-            selected_file_path = file_options[selected_file_label]
 
             if st.button("🔄 Refresh"):
                 st.cache_data.clear()
                 st.success("Cache cleared. Latest data loaded.")
                 
             try:
-                file_data = read_json_from_data(selected_file_path)
+                file_data = file_options[selected_file_label]()
                 st.subheader(f"Showing: {selected_file_label}")
                 st.json(file_data)
 
             except Exception as e:
-                st.error(f"Error loading {selected_file_path}: {str(e)}")
+                st.error(f"Error loading {selected_file_label}: {str(e)}")
 
 
 
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "REST"))
+sys.path.insert(0, os.path.join(ROOT, "Common"))
+
+from zc_cdc import data_utils
+from zc_cdc.index import ZoneIndex
+from zc_cdc.snapshot_cache import SnapshotCache
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Point data_utils at an empty data directory with fresh caches."""
+    monkeypatch.setattr(data_utils, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(data_utils, "_backend", None)
+    monkeypatch.setattr(data_utils, "_cache", SnapshotCache())
+    monkeypatch.setattr(data_utils, "_index", ZoneIndex())
+    monkeypatch.delenv("CDC_STORAGE_BACKEND", raising=False)
+    return tmp_path
@@ -0,0 +1,103 @@
+import pytest
+
+from zc_cdc import config_manager, data_utils
+from zc_cdc.config_manager import (ZoneConfigView, StaleViewError, alias_added, alias_removed,
+                                   alias_purged, zone_created, zone_deleted, group_created,
+                                   group_deleted, zone_grouped, zone_ungrouped)
+from zc_cdc.filelock import lock_for
+
+HOST = {"name": "host1", "type": "Host", "ip": "", "nqn": "nqn.a"}
+PORT = {"name": "port1", "type": "Host-Port", "ip": "10.0.0.1", "nqn": "nqn.b"}
+
+
+@pytest.fixture
+def zone_config(data_dir, monkeypatch):
+    """Point zone_config.json at the test data directory."""
+    path = str(data_dir / "zone_config.json")
+    monkeypatch.setattr(config_manager, "ZONE_CONFIG_PATH", path)
+    monkeypatch.setattr(config_manager, "_view_lock", lock_for(path))
+    monkeypatch.setattr(config_manager, "_view", None)
+    monkeypatch.setattr(config_manager, "_view_stat", None)
+    return path
+
+
+def normalized(config):
+    """{section: {group id: {zone id: sorted alias ids}}}, ignoring order and timestamps."""
+    return {
+        section: {
+            group["ZoneGrpId"]: {
+                zone["ZoneId"]: sorted(a["AliasId"] for a in zone["AliasMembers"])
+                for zone in group["ZoneMembers"]
+            }
+            for group in config[section]
+        }
+        for section in ("active", "inactive")
+    }
+
+
+def current_view():
+    return config_manager._load_view().config
+
+
+def rebuilt_view():
+    config_manager.update_zone_config()
+    return current_view()
+
+
+def test_patches_match_full_rebuild(zone_config):
+    zones = {"active_zones": {"1": {"name": "z1", "aliases": {"1": HOST}}},
+             "inactive_zones": {"2": {"name": "z2", "aliases": {}}}}
+    groups = {"zone_groups": {"1": {"name": "g1", "zones": ["1"]}}}
+    data_utils.save_zones(zones)
+    data_utils.save_zonegroup(groups)
+    config_manager.update_zone_config()
+
+    # Add an alias to z1, create z3 (ungrouped), create g2 and put z2 in it.
+    zones["active_zones"]["1"]["aliases"]["2"] = PORT
+    zones["inactive_zones"]["3"] = {"name": "z3", "aliases": {}}
+    groups["zone_groups"]["2"] = {"name": "g2", "zones": ["2"]}
+    data_utils.save_zones(zones)
+    data_utils.save_zonegroup(groups)
+    config_manager.apply_zone_config_changes([
+        alias_added("1", "2", PORT),
+        zone_created("3", zones["inactive_zones"]["3"]),
+        group_created("2", "g2"),
+        zone_grouped("2", "2", zones["inactive_zones"]["2"]),
+    ])
+    patched = normalized(current_view())
+    assert patched == normalized(rebuilt_view())
+    assert patched == {"active": {1: {1: [1, 2]}, 2: {2: []}}, "inactive": {0: {3: []}}}
+
+
+def test_alias_purge_covers_inactive_zones():
+    view = ZoneConfigView({"active": [], "inactive": [], "last_updated": ""})
+    view.apply(zone_created("5", {"name": "z5", "aliases": {"1": HOST}}))
+    view.apply(zone_created("6", {"name": "z6", "aliases": {"1": HOST, "2": PORT}}))
+    view.apply(alias_purged("host1"))
+    assert normalized(view.config) == {"active": {}, "inactive": {0: {5: [], 6: [2]}}}
+    assert "host1" not in view.alias_zones
+
+
+def test_alias_removed_and_zone_deleted():
+    view = ZoneConfigView({"active": [], "inactive": [], "last_updated": ""})
+    view.apply(zone_created("5", {"name": "z5", "aliases": {"1": HOST, "2": PORT}}))
+    view.apply(alias_removed("5", "1"))
+    zone = view.config["inactive"][0]["ZoneMembers"][0]
+    assert (zone["aliasCount"], zone["AliasMembers"][0]["AliasName"]) == (1, "port1")
+
+    # The last ungrouped zone takes the Ungrouped entry with it.
+    view.apply(zone_deleted("5"))
+    assert view.config["inactive"] == [] and view.zones == {}
+
+
+def test_changes_the_view_cannot_absorb_ask_for_a_rebuild():
+    view = ZoneConfigView({"active": [], "inactive": [], "last_updated": ""})
+    view.apply(group_created("1", "g1"))
+    with pytest.raises(StaleViewError):
+        view.apply(group_created("1", "g1"))
+    view.apply(zone_grouped("1", "4", {"name": "z4", "aliases": {}}))
+    with pytest.raises(StaleViewError):
+        view.apply(group_deleted("1"))
+    view.apply(zone_ungrouped("1", "4", None))
+    view.apply(group_deleted("1"))
+    assert view.config["active"] == []
@@ -0,0 +1,93 @@
+import os
+import threading
+
+import pytest
+
+from zc_cdc import data_utils
+from zc_cdc.data_utils import ConflictError
+
+
+def zones(*names):
+    return {"active_zones": {}, "inactive_zones": {str(i): {"name": n, "aliases": {}} for i, n in enumerate(names, 1)}}
+
+
+def test_save_bumps_revision(data_dir):
+    assert data_utils.get_revision("zones") == 0
+    assert data_utils.save_zones(zones("a")) == 1
+    assert data_utils.save_zones(zones("a", "b")) == 2
+    data, revision = data_utils.load_versioned("zones")
+    assert revision == 2
+    assert data == zones("a", "b")
+
+
+def test_stale_expected_revision_conflicts(data_dir):
+    data_utils.save_zones(zones("a"))
+    data, revision = data_utils.load_versioned("zones")
+    data_utils.save_zones(zones("a", "other"), expected_revision=revision)
+
+    data["inactive_zones"]["9"] = {"name": "mine", "aliases": {}}
+    with pytest.raises(ConflictError) as info:
+        data_utils.save_zones(data, expected_revision=revision)
+    assert (info.value.expected, info.value.actual) == (1, 2)
+    # The losing save changed nothing.
+    assert data_utils.load_versioned("zones") == (zones("a", "other"), 2)
+
+
+def test_matching_expected_revision_saves(data_dir):
+    data_utils.save_zones(zones("a"))
+    data, revision = data_utils.load_versioned("zones")
+    data["inactive_zones"]["2"] = {"name": "b", "aliases": {}}
+    assert data_utils.save_zones(data, expected_revision=revision) == revision + 1
+
+
+def test_save_document_keeps_higher_revision(data_dir):
+    assert data_utils.save_document("zones", zones("a"), revision=7) == 7
+    # Never goes backwards.
+    assert data_utils.save_document("zones", zones("b"), revision=3) == 8
+
+
+def test_concurrent_read_modify_write_loses_nothing(data_dir):
+    data_utils.save_zones(zones())
+
+    def add(prefix):
+        for i in range(20):
+            with data_utils.locked("zones"):
+                data, revision = data_utils.load_versioned("zones")
+                data["inactive_zones"][f"{prefix}{i}"] = {"name": f"{prefix}{i}", "aliases": {}}
+                data_utils.save_zones(data, expected_revision=revision)
+
+    threads = [threading.Thread(target=add, args=(p,)) for p in "abcd"]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    data, revision = data_utils.load_versioned("zones")
+    assert len(data["inactive_zones"]) == 80
+    assert revision == 81
+
+
+def test_index_follows_saves(data_dir):
+    data_utils.save_zones(zones("a", "b"))
+    index = data_utils.get_index()
+    assert index.zone_id("b") == "2"
+
+    data = data_utils.load_zones()
+    data["active_zones"]["2"] = data["inactive_zones"].pop("2")
+    del data["inactive_zones"]["1"]
+    data["inactive_zones"]["3"] = {"name": "c", "aliases": {}}
+    data_utils.save_zones(data)
+    assert (index.zone_id("a"), index.zone_id("b"), index.zone_id("c")) == (None, "2", "3")
+
+
+def test_snapshot_sees_same_size_rewrite_in_same_mtime_tick(data_dir):
+    data_utils.save_zones(zones("a"))
+    assert data_utils.snapshot_zones()["inactive_zones"]["1"]["name"] == "a"
+
+    # Another process renames the zone to a name of the same length; the
+    # file keeps its size and, on a coarse clock, its mtime.
+    path = data_utils._doc_path("zones")
+    st = os.stat(path)
+    data_utils.write_json_atomic(path, zones("b"))
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert os.stat(path).st_size == st.st_size
+    assert data_utils.snapshot_zones()["inactive_zones"]["1"]["name"] == "b"
@@ -0,0 +1,42 @@
+import gzip
+import json
+import zlib
+
+import pytest
+
+from encoding import negotiate_encoding, encode_chunks, COMPRESS_MIN_BYTES
+
+BODY = {"zones": {str(i): {"name": f"zone-{i}", "aliases": {}} for i in range(2000)}}
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br", "gzip"),
+    ("deflate", "deflate"),
+    ("gzip;q=0, deflate;q=0.5", "deflate"),
+    ("*", "gzip"),
+    ("br", None),
+    (None, None),
+])
+def test_negotiate_encoding(header, expected):
+    assert negotiate_encoding(header) == expected
+
+
+@pytest.mark.parametrize("encoding, decode", [
+    (None, lambda data: data),
+    ("gzip", gzip.decompress),
+    ("deflate", zlib.decompress),
+])
+def test_chunks_decode_to_the_json_body(encoding, decode):
+    chunks, used, size = encode_chunks(BODY, encoding, chunk_size=4096)
+    assert used == encoding
+    assert len(chunks) > 1
+    assert size == sum(len(c) for c in chunks)
+    assert json.loads(decode(b"".join(chunks))) == BODY
+
+
+def test_small_bodies_are_not_compressed():
+    body = {"a": 1}
+    assert len(json.dumps(body)) < COMPRESS_MIN_BYTES
+    chunks, used, size = encode_chunks(body, "gzip")
+    assert used is None
+    assert b"".join(chunks) == b'{"a":1}' and size == 7
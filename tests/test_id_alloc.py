@@ -0,0 +1,54 @@
+import threading
+
+from zc_cdc.id_alloc import IdAllocator, IdPool
+
+
+def test_ids_are_seeded_once_and_never_reused(tmp_path):
+    alloc = IdAllocator(str(tmp_path / "id_sequences.json"))
+    seeds = []
+
+    def seed():
+        seeds.append(1)
+        return 41
+
+    assert alloc.next_id("zone", seed) == "42"
+    assert alloc.next_id("zone", seed) == "43"
+    assert seeds == [1]
+    assert alloc.reserve("zone", 10) == 44
+    assert alloc.peek("zone") == 53
+    assert alloc.next_id("alias") == "1"
+
+
+def test_concurrent_allocation_has_no_duplicates(tmp_path):
+    alloc = IdAllocator(str(tmp_path / "id_sequences.json"))
+    ids = []
+
+    def worker():
+        for _ in range(25):
+            ids.append(alloc.next_id("zone"))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(map(int, ids)) == list(range(1, 101))
+
+
+def test_pool_reserves_in_blocks(tmp_path):
+    alloc = IdAllocator(str(tmp_path / "id_sequences.json"))
+    calls = []
+
+    def reserve(entity, count):
+        calls.append(count)
+        return alloc.reserve(entity, count)
+
+    pool = IdPool(reserve, block=4)
+    assert [pool.take("zone") for _ in range(5)] == ["1", "2", "3", "4", "5"]
+    assert calls == [4, 4]
+
+    # ensure() covers a whole batch with one reservation.
+    pool.ensure("zone", 10)
+    assert calls == [4, 4, 7]
+    assert [pool.take("zone") for _ in range(10)] == [str(i) for i in range(6, 16)]
+    assert calls == [4, 4, 7]
@@ -0,0 +1,70 @@
+import pytest
+
+flask = pytest.importorskip("flask")
+
+from idempotency import IdempotencyStore, idempotent
+
+
+@pytest.fixture
+def client():
+    app = flask.Flask(__name__)
+    store = IdempotencyStore(ttl=60, max_keys=2)
+    created = []
+
+    @app.route("/zone/<name>", methods=["POST"])
+    @idempotent(store)
+    def create(name):
+        if name == "broken":
+            return flask.jsonify({"error": "server error"}), 500
+        created.append(name)
+        return flask.jsonify({"message": f"created {name}", "n": len(created)}), 201
+
+    client = app.test_client()
+    client.created = created
+    client.store = store
+    return client
+
+
+def post(client, name, key=None, body=b"{}"):
+    headers = {"Idempotency-Key": key} if key else {}
+    return client.post(f"/zone/{name}", data=body, headers=headers)
+
+
+def test_retry_replays_the_first_response(client):
+    first = post(client, "a", "k1")
+    retry = post(client, "a", "k1")
+    assert client.created == ["a"]
+    assert (retry.status_code, retry.get_json()) == (201, first.get_json())
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert client.store.replays == 1
+
+
+def test_requests_without_a_key_always_run(client):
+    post(client, "a")
+    post(client, "a")
+    assert client.created == ["a", "a"]
+
+
+def test_key_is_scoped_to_the_path(client):
+    post(client, "a", "k1")
+    post(client, "b", "k1")
+    assert client.created == ["a", "b"]
+
+
+def test_reused_key_with_a_different_body_is_rejected(client):
+    post(client, "a", "k1", body=b'{"x": 1}')
+    response = post(client, "a", "k1", body=b'{"x": 2}')
+    assert response.status_code == 422
+    assert client.created == ["a"]
+
+
+def test_server_errors_are_not_remembered(client):
+    assert post(client, "broken", "k1").status_code == 500
+    assert "Idempotent-Replayed" not in post(client, "broken", "k1").headers
+
+
+def test_oldest_keys_are_evicted(client):
+    for key in ("k1", "k2", "k3"):
+        post(client, "a", key)
+    post(client, "a", "k1")    # evicted by k3, so it runs again
+    assert len(client.created) == 4
@@ -0,0 +1,31 @@
+from zc_cdc.index import ZoneIndex
+from zc_cdc.documents import diff_records
+
+
+def aliases(**members):
+    return {"member_aliases": {}, "free_aliases": members}
+
+
+def test_alias_lookup_by_nqn_and_ip():
+    index = ZoneIndex()
+    index.index_aliases(aliases(**{
+        "1": {"name": "host1", "type": "Host", "ip": "", "nqn": "nqn.a"},
+        "2": {"name": "port1", "type": "Host-Port", "ip": "10.0.0.1", "nqn": "nqn.b"},
+    }))
+    assert index.alias_by_nqn("nqn.a") == "1"
+    assert index.alias_by_ip("10.0.0.1") == "2"
+    assert index.alias_by_ip("") is None
+
+
+def test_alias_maps_follow_records():
+    index = ZoneIndex()
+    old = aliases(**{"1": {"name": "host1", "ip": "10.0.0.1", "nqn": "nqn.a"}})
+    new = aliases(**{"1": {"name": "host1", "ip": "10.0.0.2", "nqn": "nqn.a"},
+                     "2": {"name": "host2", "ip": "", "nqn": "nqn.b"}})
+    index.index_aliases(old)
+    index.apply_records("alias", diff_records("alias", old, new), version=2)
+    assert index.alias_by_ip("10.0.0.1") is None
+    assert (index.alias_by_ip("10.0.0.2"), index.alias_by_nqn("nqn.b")) == ("1", "2")
+
+    index.apply_records("alias", diff_records("alias", new, aliases()), version=3)
+    assert index.nqn_alias == index.ip_alias == index.alias_ids == {}
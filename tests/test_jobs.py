@@ -0,0 +1,65 @@
+import threading
+import time
+
+import pytest
+
+from jobs import JobManager
+
+
+@pytest.fixture
+def manager():
+    manager = JobManager(workers=1, history=10)
+    yield manager
+    manager.shutdown(timeout=2)
+
+
+def wait_finished(job, timeout=2):
+    deadline = time.monotonic() + timeout
+    while job.to_dict()["finished"] is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job.to_dict(limit=0)
+
+
+def test_job_reports_progress_and_outcome(manager):
+    def work(job):
+        job.record([{"index": 0, "status": 201}], 0)
+        job.record([{"index": 1, "status": 400}], 1)
+
+    state = wait_finished(manager.submit("batch:zones", 2, work))
+    assert (state["status"], state["processed"], state["failed"], state["progress"]) == ("partial", 2, 1, 1.0)
+
+
+def test_failing_work_marks_the_job_failed(manager):
+    def work(job):
+        raise RuntimeError("disk full")
+
+    state = wait_finished(manager.submit("batch:zones", 1, work))
+    assert (state["status"], state["error"]) == ("failed", "disk full")
+
+
+def test_shutdown_cancels_queued_and_stops_running_jobs():
+    manager = JobManager(workers=1)
+    running = threading.Event()
+    chunks = []
+
+    def work(job):
+        running.set()
+        while not job.cancel_requested:
+            chunks.append(1)
+            time.sleep(0.01)
+
+    first = manager.submit("batch:zones", 100, work)
+    queued = manager.submit("batch:zones", 100, work)
+    assert running.wait(2)
+
+    manager.shutdown(timeout=2)
+    assert first.to_dict()["status"] == "cancelled"
+    assert queued.to_dict()["status"] == "cancelled"
+    assert queued.to_dict()["started"] is None
+    assert not any(w.is_alive() for w in manager._workers)
+    with pytest.raises(RuntimeError):
+        manager.submit("batch:zones", 1, work)
+
+
+def test_workers_do_not_block_interpreter_exit(manager):
+    assert all(w.daemon for w in manager._workers)
@@ -0,0 +1,80 @@
+import json
+import os
+
+import pytest
+
+from zc_cdc.journal_store import JournalStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    # Compaction is driven by the tests.
+    return JournalStore(lambda doc: str(tmp_path / f"{doc}.json"), compact_records=10**6,
+                        compact_interval=3600)
+
+
+def zones(**inactive):
+    return {"active_zones": {}, "inactive_zones": inactive}
+
+
+def test_first_save_is_a_snapshot_then_only_changes_are_journaled(store):
+    store.save("zones", zones(**{"1": {"name": "a"}}))
+    assert not os.path.exists(store.journal_path("zones"))
+    assert store._compactor is None
+
+    store.save("zones", zones(**{"1": {"name": "a"}, "2": {"name": "b"}}))
+    with open(store.journal_path("zones")) as f:
+        records = [json.loads(line) for line in f]
+    assert records == [{"op": "put", "section": "inactive_zones", "key": "2", "value": {"name": "b"}}]
+    assert store._compactor is not None
+
+
+def test_new_store_replays_journal_over_snapshot(store, tmp_path):
+    store.save("zones", zones(**{"1": {"name": "a"}, "2": {"name": "b"}}))
+    store.save("zones", zones(**{"2": {"name": "b2"}, "3": {"name": "c"}}))
+
+    reopened = JournalStore(store.path_for, compact_interval=3600)
+    assert reopened.load("zones") == zones(**{"2": {"name": "b2"}, "3": {"name": "c"}})
+    assert reopened._pending["zones"] == 3
+
+
+def test_torn_tail_is_ignored(store):
+    store.save("zones", zones(**{"1": {"name": "a"}}))
+    store.save("zones", zones(**{"1": {"name": "a"}, "2": {"name": "b"}}))
+    # A crash in the middle of an append leaves a partial last line.
+    with open(store.journal_path("zones"), "a") as f:
+        f.write('{"op": "put", "section": "inactive_zones", "key": "3", "val')
+
+    reopened = JournalStore(store.path_for, compact_interval=3600)
+    assert reopened.load("zones") == zones(**{"1": {"name": "a"}, "2": {"name": "b"}})
+
+
+def test_compact_folds_journal_into_snapshot(store):
+    store.save("zones", zones(**{"1": {"name": "a"}}))
+    store.save("zones", zones(**{"1": {"name": "a"}, "2": {"name": "b"}}))
+    store.compact("zones")
+
+    assert not os.path.exists(store.journal_path("zones"))
+    with open(store.path_for("zones")) as f:
+        assert json.load(f) == zones(**{"1": {"name": "a"}, "2": {"name": "b"}})
+    assert store.load("zones") == zones(**{"1": {"name": "a"}, "2": {"name": "b"}})
+
+
+def test_records_replay_idempotently_after_interrupted_compaction(store):
+    store.save("zones", zones(**{"1": {"name": "a"}}))
+    store.save("zones", zones(**{"2": {"name": "b"}}))
+    # Crash after the new snapshot was written but before the journal was removed.
+    journal = open(store.journal_path("zones")).read()
+    store.compact("zones")
+    with open(store.journal_path("zones"), "w") as f:
+        f.write(journal)
+
+    reopened = JournalStore(store.path_for, compact_interval=3600)
+    assert reopened.load("zones") == zones(**{"2": {"name": "b"}})
+
+
+def test_load_returns_a_private_copy(store):
+    store.save("zones", zones(**{"1": {"name": "a"}}))
+    data = store.load("zones")
+    data["inactive_zones"]["1"]["name"] = "changed"
+    assert store.load("zones")["inactive_zones"]["1"]["name"] == "a"
@@ -0,0 +1,67 @@
+import pytest
+
+import listing
+from listing import ListingError, NameListing
+
+
+DATA = {
+    "active_zones": {"1": {"name": "web-1"}, "2": {"name": "db-1"}},
+    "inactive_zones": {"3": {"name": "web-2"}, "4": {"name": "web-3"}, "5": {"name": "app"}},
+}
+
+
+def zone_matches_type(section, zone, zone_type):
+    return section == f"{zone_type}_zones"
+
+
+@pytest.fixture
+def get_page():
+    zones = NameListing(("active_zones", "inactive_zones"))
+
+    def get(data, revision=1, **args):
+        params = listing.parse_args({"limit": "2", **args})
+        return listing.page(zones, revision, data, params, zone_matches_type)
+    return get
+
+
+def test_cursor_walks_every_item_once_in_name_order(get_page):
+    names = []
+    cursor = None
+    while True:
+        result = get_page(DATA, **({"cursor": cursor} if cursor else {}))
+        names += [item["name"] for item in result["items"]]
+        cursor = result["next_cursor"]
+        if cursor is None:
+            break
+    assert names == ["app", "db-1", "web-1", "web-2", "web-3"]
+
+
+def test_cursor_survives_writes_between_pages(get_page):
+    first = get_page(DATA)
+    assert [i["name"] for i in first["items"]] == ["app", "db-1"]
+
+    # "db-1" is deleted and "cache" added before the next page is fetched.
+    changed = {"active_zones": {"1": {"name": "web-1"}, "6": {"name": "cache"}},
+               "inactive_zones": DATA["inactive_zones"]}
+    second = get_page(changed, revision=2, cursor=first["next_cursor"])
+    assert [i["name"] for i in second["items"]] == ["web-1", "web-2"]
+
+
+def test_prefix_type_and_fields(get_page):
+    result = get_page(DATA, prefix="web", type="inactive", fields="name", limit="10")
+    assert result["items"] == [{"id": "3", "name": "web-2"}, {"id": "4", "name": "web-3"}]
+    assert result["next_cursor"] is None
+
+
+def test_full_response_without_listing_parameters():
+    assert listing.parse_args({}) is None
+
+
+@pytest.mark.parametrize("args", [{"limit": "x"}, {"limit": "0"}, {"cursor": "a"}])
+def test_bad_parameters(args):
+    with pytest.raises(ListingError):
+        listing.parse_args(args)
+
+
+def test_limit_is_capped():
+    assert listing.parse_args({"limit": "999999"})["limit"] == listing.MAX_LIMIT
@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("backoff")
+
+import restncache
+from restncache import ResponseCache
+
+
+def test_fresh_entries_are_hits_and_copies():
+    cache = ResponseCache()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return {"items": [1, 2]}
+
+    first = cache.get("k", loader, ttl=60)
+    first["items"].append(3)
+    assert cache.get("k", loader, ttl=60) == {"items": [1, 2]}
+    assert len(loads) == 1
+    assert (cache.counts["hits"], cache.counts["misses"]) == (1, 1)
+
+
+def test_stale_entry_is_served_while_refreshed_in_background():
+    cache = ResponseCache()
+    cache.get("k", lambda: "old", ttl=0.05, stale=10)
+    time.sleep(0.1)
+    refreshed = threading.Event()
+
+    def reload():
+        refreshed.set()
+        return "new"
+
+    assert cache.get("k", reload, ttl=0.05, stale=10) == "old"
+    assert refreshed.wait(2)
+    deadline = time.monotonic() + 2
+    while cache.counts["refreshes"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.get("k", reload, ttl=60) == "new"
+
+
+def test_expired_entry_is_reloaded_before_returning():
+    cache = ResponseCache()
+    cache.get("k", lambda: "old", ttl=0.01, stale=0)
+    time.sleep(0.05)
+    assert cache.get("k", lambda: "new", ttl=60) == "new"
+
+
+def test_size_is_counted_in_bytes_and_bounded():
+    cache = ResponseCache(max_bytes=100)
+    cache.get("a", lambda: "é" * 10, ttl=60)     # stored as "\u00e9..." JSON: 62 bytes
+    assert cache.stats()["bytes"] == 62
+    cache.get("b", lambda: "x" * 10, ttl=60)     # 12 bytes, 74 in total
+    cache.get("c", lambda: "y" * 30, ttl=60)     # 32 more is over 100: "a" is evicted
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["bytes"] == 44
+    assert cache.counts["evictions"] == 1
+    cache.get("huge", lambda: "z" * 200, ttl=60)
+    assert cache.stats()["entries"] == 2        # larger than the cache: not stored
+
+
+def test_invalidate_server_only_drops_that_servers_entries(monkeypatch):
+    cache = ResponseCache()
+    monkeypatch.setattr(restncache, "get_response_cache", lambda: cache)
+    calls = []
+
+    @restncache.shared_cache(ttl_seconds=60)
+    def fetch(cdc_server_ip, command):
+        calls.append((cdc_server_ip, command))
+        return {"ip": cdc_server_ip}
+
+    for ip, command in (("10.0.0.1", "zones"), ("10.0.0.1", "aliases"), ("10.0.0.2", "zones")):
+        fetch(ip, command)
+    assert restncache.invalidate_server("10.0.0.1") == 2
+    fetch("10.0.0.1", "zones")
+    fetch("10.0.0.2", "zones")
+    assert calls[3:] == [("10.0.0.1", "zones")]
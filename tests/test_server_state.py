@@ -0,0 +1,139 @@
+import time
+
+import pytest
+
+from zc_cdc import data_utils
+from server_state import ServerState
+
+
+@pytest.fixture
+def state(data_dir):
+    data_utils.save_zones({"active_zones": {}, "inactive_zones": {"1": {"name": "base", "aliases": {}}}})
+    # Flushes are driven by the tests; the flusher thread stays idle.
+    server = ServerState(flush_delay=3600, poll_interval=3600)
+    yield server
+    server.close()
+
+
+def create_zone(state, zone_id, name):
+    with state.lock:
+        state.docs["zones"]["inactive_zones"][zone_id] = {"name": name, "aliases": {}}
+        return state.commit("zones")
+
+
+def names(data):
+    return sorted(z["name"] for section in ("active_zones", "inactive_zones") for z in data[section].values())
+
+
+def test_flush_writes_the_revision_it_handed_out(state):
+    create_zone(state, "2", "a")
+    revision = create_zone(state, "3", "b")
+    assert data_utils.get_revision("zones") == 1
+
+    state.flush("zones")
+    data, disk_revision = data_utils.load_versioned("zones")
+    assert disk_revision == revision == state.revision("zones")
+    assert data == state.docs["zones"]
+
+
+def test_merge_keeps_both_writers_changes(state):
+    # Another writer saves while we have unflushed changes.
+    theirs, rev = data_utils.load_versioned("zones")
+    theirs["inactive_zones"]["10"] = {"name": "theirs", "aliases": {}}
+    data_utils.save_zones(theirs, expected_revision=rev)
+    create_zone(state, "11", "ours")
+
+    state.flush("zones")
+    data, disk_revision = data_utils.load_versioned("zones")
+    assert names(data) == ["base", "ours", "theirs"]
+    # Memory holds exactly what was saved, under the same revision.
+    assert state.revision("zones") == disk_revision
+    assert state.docs["zones"] == data
+    assert state.index.zone_id("theirs") == "10"
+
+
+def test_merged_revision_is_new(state):
+    handed_out = create_zone(state, "11", "ours")
+    theirs, rev = data_utils.load_versioned("zones")
+    theirs["inactive_zones"]["10"] = {"name": "theirs", "aliases": {}}
+    data_utils.save_zones(theirs, expected_revision=rev)
+    assert data_utils.get_revision("zones") == handed_out   # same number, different content
+
+    state.flush("zones")
+    assert state.revision("zones") > handed_out
+    assert data_utils.get_revision("zones") == state.revision("zones")
+
+    # A later external save is a new revision, not one the server already uses.
+    state_revision = state.revision("zones")
+    data, rev = data_utils.load_versioned("zones")
+    data["inactive_zones"]["12"] = {"name": "later", "aliases": {}}
+    assert data_utils.save_zones(data, expected_revision=rev) == state_revision + 1
+
+
+def test_merge_drops_duplicate_name(state):
+    theirs, rev = data_utils.load_versioned("zones")
+    theirs["inactive_zones"]["18"] = {"name": "dup", "aliases": {}}
+    data_utils.save_zones(theirs, expected_revision=rev)
+    create_zone(state, "19", "dup")
+
+    state.flush("zones")
+    data = data_utils.load_zones()
+    assert names(data) == ["base", "dup"]
+    assert "18" in data["inactive_zones"]
+    assert state.docs["zones"] == data
+    assert state.index.zone_id("dup") == "18"
+
+
+def test_merge_reports_reload(data_dir):
+    data_utils.save_zones({"active_zones": {}, "inactive_zones": {}})
+    reloads = []
+    server = ServerState(flush_delay=3600, poll_interval=3600,
+                         on_reload=lambda doc, revision: reloads.append((doc, revision)))
+    try:
+        data, rev = data_utils.load_versioned("zones")
+        data_utils.save_zones(data, expected_revision=rev)
+        create_zone(server, "5", "ours")
+        server.flush("zones")
+        assert reloads == [("zones", server.revision("zones"))]
+    finally:
+        server.close()
+
+
+def test_clean_document_reloads_external_save(state):
+    data, rev = data_utils.load_versioned("zones")
+    data["inactive_zones"]["7"] = {"name": "external", "aliases": {}}
+    new_revision = data_utils.save_zones(data, expected_revision=rev)
+
+    state._reload("zones")
+    assert state.revision("zones") == new_revision
+    assert state.index.zone_id("external") == "7"
+
+
+def test_flusher_survives_failed_reload(data_dir):
+    data_utils.save_zones({"active_zones": {}, "inactive_zones": {}})
+
+    def on_reload(doc, revision):
+        raise RuntimeError("listener failed")
+
+    server = ServerState(flush_delay=0.01, poll_interval=0.05, on_reload=on_reload)
+    try:
+        data, rev = data_utils.load_versioned("zones")
+        data_utils.save_zones(data, expected_revision=rev)
+        time.sleep(0.3)
+        assert server._flusher.is_alive()
+
+        # Still persisting: a later change reaches disk without close().
+        revision = create_zone(server, "5", "after")
+        deadline = time.monotonic() + 2
+        while data_utils.get_revision("zones") != revision and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert data_utils.get_revision("zones") == revision
+    finally:
+        server.close()
+
+
+def test_close_stops_flusher_and_flushes(state):
+    revision = create_zone(state, "2", "pending")
+    state.close()
+    assert not state._flusher.is_alive()
+    assert data_utils.get_revision("zones") == revision
@@ -0,0 +1,59 @@
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight, ResponseCache
+
+
+def test_concurrent_callers_share_one_computation():
+    flights = SingleFlight()
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(2)
+        return "body"
+
+    results = []
+    owner = threading.Thread(target=lambda: results.append(flights.do("k", compute)))
+    owner.start()
+    started.wait(2)
+    waiters = [threading.Thread(target=lambda: results.append(flights.do("k", compute))) for _ in range(3)]
+    for t in waiters:
+        t.start()
+    while flights.shared < 3:
+        time.sleep(0.01)
+    release.set()
+    for t in [owner] + waiters:
+        t.join()
+    assert results == ["body"] * 4
+    assert len(calls) == 1
+
+    # Finished flights are forgotten: the next call computes again.
+    assert flights.do("k", lambda: "again") == "again"
+
+
+def test_error_reaches_the_caller_and_is_not_kept():
+    flights = SingleFlight()
+    with pytest.raises(ValueError):
+        flights.do("k", lambda: (_ for _ in ()).throw(ValueError("boom")))
+    assert flights.do("k", lambda: 1) == 1
+
+
+def test_response_cache_is_bounded_by_entries_and_bytes():
+    cache = ResponseCache(max_entries=2, max_bytes=10)
+    cache.put("a", "A", 4)
+    cache.put("b", "B", 4)
+    assert cache.get("a") == "A"        # "b" is now least recently used
+    cache.put("c", "C", 4)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("A", "C")
+
+    cache.put("d", "D", 8)              # over max_bytes with anything else
+    assert cache.stats()["entries"] == 1 and cache.stats()["bytes"] == 8
+    cache.put("huge", "H", 11)          # larger than the cache: not stored
+    assert cache.get("huge") is None
@@ -0,0 +1,46 @@
+from zc_cdc import data_utils
+from zc_cdc.documents import write_json_atomic
+from zc_cdc.sqlite_store import SQLiteStore
+
+
+ZONES = {"active_zones": {"1": {"name": "a", "aliases": {}}},
+         "inactive_zones": {"2": {"name": "b", "aliases": {}}}}
+
+
+def test_migration_imports_json_files_once(data_dir):
+    write_json_atomic(str(data_dir / "zones_data.json"), ZONES)
+    write_json_atomic(str(data_dir / "nodes.json"), {"nodes": [{"NQN": "nqn.a"}, {"NQN": "nqn.b"}]})
+
+    backend = data_utils.SQLiteBackend(str(data_dir))
+    assert backend.load("zones") == ZONES
+    assert backend.load("nodes") == {"nodes": [{"NQN": "nqn.a"}, {"NQN": "nqn.b"}]}
+    assert backend.load("alias") is None     # no JSON file to import
+
+    # After the import the JSON files are no longer read.
+    write_json_atomic(str(data_dir / "zones_data.json"), {"active_zones": {}, "inactive_zones": {}})
+    assert not backend.store.migrate_from(data_utils.JSONFileBackend(str(data_dir)).load)
+    assert data_utils.SQLiteBackend(str(data_dir)).load("zones") == ZONES
+
+
+def test_save_writes_only_changed_rows_and_bumps_version(tmp_path):
+    store = SQLiteStore(str(tmp_path / "store.sqlite3"))
+    assert store.version("zones") is None
+    store.save("zones", ZONES)
+    assert store.version("zones") == 1
+
+    changed = {"active_zones": {"1": {"name": "a", "aliases": {}}},
+               "inactive_zones": {"3": {"name": "c", "aliases": {}}}}
+    store.save("zones", changed)
+    assert store.version("zones") == 2
+    assert store.load("zones") == changed
+    rows = store._connect().execute("SELECT key, position FROM rows WHERE doc = 'zones' ORDER BY key").fetchall()
+    # Zone 1 was not rewritten and keeps its position; the new row goes last.
+    assert rows == [("1", 1), ("3", 3)]
+
+
+def test_storage_backend_is_selected_by_environment(data_dir, monkeypatch):
+    monkeypatch.setenv("CDC_STORAGE_BACKEND", "sqlite")
+    data_utils.save_zones(ZONES)
+    assert isinstance(data_utils.get_backend(), data_utils.SQLiteBackend)
+    assert data_utils.load_zones() == ZONES
+    assert not (data_dir / "zones_data.json").exists()
@@ -1,17 +1,43 @@
 #zc_cdc/activate_zone.py
 import streamlit as st
 import json
+import uuid
 import requests
 import pandas as pd
-from .data_utils import load_zones, save_zones, load_alias, save_alias, load_zonegroup
-from .config_manager import update_zone_config
-
+from .data_utils import (load_zones, save_zones, load_alias, get_index,
+                         load_versioned, wait_for_revision, ConflictError)
+from .config_manager import (apply_zone_config_changes, zone_created, zone_deleted,
+                             alias_added, alias_removed)
+
+
+def api_headers():
+    """Authorization for the REST server: the session token issued at login, if any."""
+    token = st.session_state.get("session_token")
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+def rest_mutation(method, path, attempts=2):
+    """Send a create/delete to the REST server.
+
+    A dropped connection or timeout is retried with the same
+    Idempotency-Key, so the server applies the change at most once.
+    """
+    headers = {**api_headers(), "Idempotency-Key": str(uuid.uuid4())}
+    for attempt in range(attempts):
+        try:
+            return requests.request(method, f"http://localhost:5001/cdc/api/v1/{path}",
+                                    headers=headers, timeout=10)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt == attempts - 1:
+                raise
 
 def create_zone_api(zone_name):
     try:
-        res = requests.post(f"http://localhost:5001/cdc/api/v1/zone/{zone_name}")
+        res = rest_mutation("POST", f"zone/{zone_name}")
         res.raise_for_status()
-        return res.json()
+        body = res.json()
+        # The zones revision that holds the new zone once the server has saved it.
+        body["revision"] = int(res.headers.get("X-CDC-Revision", 0))
+        return body
     except requests.exceptions.RequestException as e:
         return {"error": f"Request failed: {str(e)}"}
     except json.JSONDecodeError:
@@ -19,7 +45,7 @@ def create_zone_api(zone_name):
 
 def delete_zone_api(zone_name):
     try:
-        res = requests.delete(f"http://localhost:5001/cdc/api/v1/zone/{zone_name}")
+        res = rest_mutation("DELETE", f"zone/{zone_name}")
         res.raise_for_status()
         return res.json()
     except requests.exceptions.RequestException as e:
@@ -27,9 +53,22 @@ def delete_zone_api(zone_name):
     except json.JSONDecodeError:
         return {"error": "Invalid JSON response from server"}
 
+# (ETag, body) of the last zones fetch, revalidated with If-None-Match.
+_zones_api_cache = {}
+
 def fetch_zones_from_api():
-    res = requests.get("http://localhost:5001/cdc/api/v1/zones")
-    return res.json() if res.status_code == 200 else {}
+    headers = api_headers()
+    if "etag" in _zones_api_cache:
+        headers["If-None-Match"] = _zones_api_cache["etag"]
+    res = requests.get("http://localhost:5001/cdc/api/v1/zones", headers=headers)
+    if res.status_code == 304:
+        return _zones_api_cache["body"]
+    if res.status_code != 200:
+        return {}
+    body = res.json()
+    if res.headers.get("ETag"):
+        _zones_api_cache.update(etag=res.headers["ETag"], body=body)
+    return body
 
 # def save_zones(data):
 #     with open("../CDCMgmt/data/zones_data.json", "w") as file:
@@ -56,19 +95,19 @@ def fetch_zones_from_api():
 #     except (json.JSONDecodeError, FileNotFoundError):
 #         return {"member_aliases": {}, "free_aliases": {}}
     
+def reload_after_conflict(error):
+    """Another session saved first: drop our stale copy and show fresh data."""
+    st.toast(f"Not saved: {error.doc} was changed by another user. Showing the latest data, please retry.", icon="⚠️")
+    st.rerun()
+
 def CreateActivateZone(callback_logging):
     st.write("#### Create Zone")
 
-    zones =load_zones()
+    zones, zones_rev = load_versioned("zones")
     st.session_state.zones = load_zones()
     data = zones
     st.session_state.alias_data = load_alias()
-    zonegroup_data = load_zonegroup()
-    # Create reverse mapping: zone_id -> group_name
-    zone_to_group = {}
-    for group_id, group in zonegroup_data["zone_groups"].items():
-        for zone_id in group["zones"]:
-            zone_to_group[zone_id] = group["name"]
+    index = get_index()
 
     # Create new zone section
     col1, col2 = st.columns([2,3])  
@@ -78,26 +117,20 @@ def CreateActivateZone(callback_logging):
         st.write("   ")
         st.write("   ")
         if st.button("Create Zone"):
-            if zone_name in [v["name"] for v in data["active_zones"].values()] + \
-                            [v["name"] for v in data["inactive_zones"].values()]:
+            if index.zone_id(zone_name) is not None:
                 st.error("Zone name already exists!", icon="🚫")
                 st.stop()
             if not zone_name:
                 st.error("Please provide a valid zone name.")
-            elif zone_name in [v["name"] for v in data["active_zones"].values()] + \
-                                [v["name"] for v in data["inactive_zones"].values()]:
-                    st.error("Zone name already exists!")
             else:
                 resp = create_zone_api(zone_name)
                 if "error" in resp:
                     st.error(resp["error"])
                 else:
-                        # New zones are created as inactive by default
-                    zone_id = str(len(data["inactive_zones"]) + len(data["active_zones"]) + 1)
-                    data["inactive_zones"][zone_id] = {"name": zone_name, "aliases": {}}
-                    save_zones(data)
-                    from .config_manager import update_zone_config
-                    update_zone_config()
+                    # The REST server creates and saves the zone (inactive
+                    # by default); wait for its write so the rerun shows it.
+                    wait_for_revision("zones", resp["revision"])
+                    apply_zone_config_changes([zone_created(resp["id"], {"name": zone_name, "aliases": {}})])
                     st.success(f"Zone '{zone_name}' created successfully!")
                     st.rerun()
 
@@ -117,7 +150,7 @@ def CreateActivateZone(callback_logging):
             "ID": zone_id,
             "Zone Name": zone["name"],
             # "Status": "Active" if zone_id in data["active_zones"] else "Inactive",
-            "Member of": zone_to_group.get(zone_id, " "),  
+            "Member of": index.group_name_of_zone(zone_id) or " ",
             "Alias Count": len(zone.get("aliases", {})),
             "Select": False
         })
@@ -179,13 +212,15 @@ def CreateActivateZone(callback_logging):
                     del st.session_state.zones["active_zones"][selected_zone_id]
                 else:
                     del st.session_state.zones["inactive_zones"][selected_zone_id]  
-                save_zones(st.session_state.zones)
-                update_zone_config()
+                try:
+                    save_zones(st.session_state.zones, expected_revision=zones_rev)
+                except ConflictError as e:
+                    reload_after_conflict(e)
+                apply_zone_config_changes([zone_deleted(selected_zone_id)])
                 st.success(f"Zone '{selected_zone['name']}' deleted successfully!")
                 st.session_state.confirm_delete = False
                 st.rerun()
                 
-    alias_data = load_alias()
     col1, col2 = st.columns(2)
     # Left column - Current zone aliases
     with col1:
@@ -220,10 +255,11 @@ def CreateActivateZone(callback_logging):
                 aliases_to_remove = edited_current[edited_current["Select"]]["ID"].tolist()
                 for alias_id in aliases_to_remove:
                     selected_zone['aliases'].pop(alias_id, None)
-                save_zones(data)
-                save_alias(alias_data)
-                from .config_manager import update_zone_config
-                update_zone_config()
+                try:
+                    save_zones(data, expected_revision=zones_rev)
+                except ConflictError as e:
+                    reload_after_conflict(e)
+                apply_zone_config_changes([alias_removed(selected_zone_id, alias_id) for alias_id in aliases_to_remove])
                 st.success(f"Removed {len(aliases_to_remove)} aliases")
                 st.rerun()
             # # st.table(alias_list)
@@ -245,7 +281,8 @@ def CreateActivateZone(callback_logging):
     # Right column - Available aliases to add
     with col2:
         st.write("#### Available Aliases")
-        alias_data = load_alias()  
+        # Read only: adding/removing zone members writes just the zones document.
+        alias_data = load_alias()
         current_alias_ids = set(selected_zone.get('aliases', {}).keys())
         available_aliases = {
             k: v for k, v in alias_data["free_aliases"].items() 
@@ -284,10 +321,14 @@ def CreateActivateZone(callback_logging):
                 for alias_id in aliases_to_add:
                     if alias_id in available_aliases:
                         selected_zone.setdefault('aliases', {})[alias_id] = available_aliases[alias_id]
-                save_zones(data)
-                save_alias(alias_data)
-                from .config_manager import update_zone_config
-                update_zone_config()
+                try:
+                    save_zones(data, expected_revision=zones_rev)
+                except ConflictError as e:
+                    reload_after_conflict(e)
+                apply_zone_config_changes([
+                    alias_added(selected_zone_id, alias_id, available_aliases[alias_id])
+                    for alias_id in aliases_to_add if alias_id in available_aliases
+                ])
                 st.success(f"Added {len(aliases_to_add)} aliases")
                 st.rerun()
             # st.table(alias_list)
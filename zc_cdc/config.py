@@ -3,7 +3,7 @@ import streamlit as st
 from .activate_zone import CreateActivateZone
 from .aliases import refresh_data
 from .zonegroup import CreateZoneGroup , ZoneGroupManager
-from .data_utils import load_zones, save_zones, load_alias, save_alias, load_registered_nodes, save_registered_nodes
+from .data_utils import load_zones, save_zones, load_alias, save_alias, load_registered_nodes, save_registered_nodes, get_index, cache_stats
 from datetime import datetime
 import pandas as pd
 import json
@@ -103,11 +103,16 @@ def handle_edit(edited_df):
 def update_aliases_from_nodes(nodes_data):
     # Load current alias and zone data
     alias_data = load_alias()
-    new_free_aliases = {}
+    index = get_index()
     for node in nodes_data:
         if node.get("Alias"):
-            alias_id = str(node.get("Row"))
-            alias_data["free_aliases"][alias_id] = {
+            # A node that already has an alias (created here under another
+            # row number, or through the REST API) keeps its id and section.
+            alias_id = (index.alias_by_nqn(node.get("NQN"))
+                        or index.alias_by_ip(node.get("IPAddress"))
+                        or str(node.get("Row")))
+            section = "member_aliases" if alias_id in alias_data["member_aliases"] else "free_aliases"
+            alias_data[section][alias_id] = {
                     "name": node["Alias"],
                     "type": node.get("DevType", ""),
                     "ip": node.get("IPAddress", ""),
@@ -208,15 +213,17 @@ def nodes_config():
         if selected_alias:
             if st.button("🗑️ Delete Alias", type="primary"):
                 with st.status(f"Deleting {selected_alias}..."):
-                        # 1. Remove alias from all zones
+                        # 1. Remove alias from the zones that contain it
                         zone_data = load_zones()
-                        for zone_dict in [zone_data["active_zones"], zone_data["inactive_zones"]]:
-                            for zid, zobj in zone_dict.items():
-                                aliases = zobj.get("aliases", {})
-                                # Find alias ID by name
-                                to_remove = [k for k, v in aliases.items() if v["name"] == selected_alias]
-                                for k in to_remove:
-                                    aliases.pop(k, None)
+                        for zid in get_index().zones_with_alias(selected_alias):
+                            zobj = zone_data["active_zones"].get(zid) or zone_data["inactive_zones"].get(zid)
+                            if not zobj:
+                                continue
+                            aliases = zobj.get("aliases", {})
+                            # Find alias ID by name
+                            to_remove = [k for k, v in aliases.items() if v["name"] == selected_alias]
+                            for k in to_remove:
+                                aliases.pop(k, None)
                         save_zones(zone_data)
                         # 2. Remove from alias data
                         alias_data = load_alias()
@@ -234,7 +241,6 @@ def nodes_config():
                             st.session_state.current_df['Alias'] == selected_alias, 'Alias'] = ""
                         save_registered_nodes(st.session_state.current_df.to_dict("records"))
                         remove_alias_from_all_zones(selected_alias)
-                        update_zone_config()
                         update_aliases_from_nodes(st.session_state.current_df.to_dict("records"))
                         
                         st.success(f"Alias '{selected_alias}' deleted!")
@@ -270,6 +276,9 @@ def main():
         ZoneGroupManager(callback_logging=add_log)
     
     with st.expander("Console Logs", expanded=False):
+        stats = cache_stats()
+        st.caption(f"Data cache: {stats['hits']} hits / {stats['misses']} misses "
+                   f"({stats['hit_rate']:.0%} hit rate)")
         for log in reversed(st.session_state.logs):
             st.text(log)
 
@@ -1,21 +1,52 @@
 #zc_cdc/config_manager.py
 import json
+import os
 import time
-from .data_utils import load_zones, save_zones, load_zonegroup
+from collections import namedtuple
+from .data_utils import DATA_DIR, load_zones, load_zonegroup, snapshot_zones, snapshot_zonegroup
+from .filelock import lock_for
+from .documents import write_json_atomic
 
 
-ZONE_CONFIG_PATH = "../CDCMgmt/data/zone_config.json"
+ZONE_CONFIG_PATH = os.path.join(DATA_DIR, "zone_config.json")
+# Guards the cached view and zone_config.json against concurrent sessions
+# (threads) and other processes; re-entrant, so a patch can fall back to a
+# full rebuild while holding it.
+_view_lock = lock_for(ZONE_CONFIG_PATH)
+UNGROUPED_ID = 0
+
+def _alias_member(alias_id, alias):
+    return {
+        "AliasId": int(alias_id),
+        "AliasName": alias["name"],
+        "Type": alias["type"],
+        "IPAddress": alias.get("ip", ""),
+        "NQN": alias.get("nqn", "")
+    }
+
+def _zone_member(zone_id, zone):
+    alias_members = [_alias_member(alias_id, alias) for alias_id, alias in zone.get("aliases", {}).items()]
+    return {
+        "ZoneId": int(zone_id),
+        "ZoneName": zone["name"],
+        "aliasCount": len(alias_members),
+        "AliasMembers": alias_members
+    }
 
 def update_zone_config():
     """Centralized function to update the shared config file"""
+    with _view_lock:
+        _rebuild_zone_config()
+
+def _rebuild_zone_config():
     config = {
         "active": [],
         "inactive": [],
         "last_updated": time.strftime("%Y-%m-%d %H:%M:%S")
     }
 
-    zonegroup_data = load_zonegroup()
-    zones_data = load_zones()
+    zonegroup_data = snapshot_zonegroup()
+    zones_data = snapshot_zones()
 
     grouped_zone_ids = set()
 
@@ -35,23 +66,7 @@ def update_zone_config():
                 continue
 
             grouped_zone_ids.add(zone_id_str)
-
-            alias_members = []
-            for alias_id, alias in zone.get("aliases", {}).items():
-                alias_members.append({
-                    "AliasId": int(alias_id),
-                    "AliasName": alias["name"],
-                    "Type": alias["type"],
-                    "IPAddress": alias.get("ip", ""),
-                    "NQN": alias.get("nqn", "")
-                })
-
-            group_entry["ZoneMembers"].append({
-                "ZoneId": int(zone_id),
-                "ZoneName": zone["name"],
-                "aliasCount": len(alias_members),
-                "AliasMembers": alias_members
-            })
+            group_entry["ZoneMembers"].append(_zone_member(zone_id, zone))
 
         group_entry["zoneCount"] = len(group_entry["ZoneMembers"])
         config["active"].append(group_entry)
@@ -62,34 +77,257 @@ def update_zone_config():
     for zone_id, zone in zones_data["inactive_zones"].items():
         if str(zone_id) in grouped_zone_ids:
             continue  # Skip zones that are already grouped
-
-        alias_members = []
-        for alias_id, alias in zone.get("aliases", {}).items():
-            alias_members.append({
-                "AliasId": int(alias_id),
-                "AliasName": alias["name"],
-                "Type": alias["type"],
-                "IPAddress": alias.get("ip", ""),
-                "NQN": alias.get("nqn", "")
-            })
-
-        ungrouped_zones.append({
-            "ZoneId": int(zone_id),
-            "ZoneName": zone["name"],
-            "aliasCount": len(alias_members),
-            "AliasMembers": alias_members
-        })
+        ungrouped_zones.append(_zone_member(zone_id, zone))
 
     if ungrouped_zones:
         config["inactive"].append({
-            "ZoneGrpId": 0,
+            "ZoneGrpId": UNGROUPED_ID,
             "ZoneGrpName": "Ungrouped",
             "zoneCount": len(ungrouped_zones),
             "ZoneMembers": ungrouped_zones
         })
 
-    with open(ZONE_CONFIG_PATH, "w") as f:
-        json.dump(config, f, indent=2)
+    _write_view(ZoneConfigView(config))
+
+
+# ---- INCREMENTAL UPDATES ----
+# A change event describes one mutation that has already been saved to the
+# data files. apply_zone_config_changes() patches only the affected entries
+# of zone_config.json instead of rebuilding it from every zone and group.
+ZoneConfigChange = namedtuple(
+    "ZoneConfigChange",
+    ["kind", "zone_id", "alias_id", "group_id", "payload"],
+    defaults=(None, None, None, None),
+)
+
+ALIAS_ADDED = "alias_added"
+ALIAS_REMOVED = "alias_removed"
+ALIAS_PURGED = "alias_purged"
+ZONE_CREATED = "zone_created"
+ZONE_DELETED = "zone_deleted"
+GROUP_CREATED = "group_created"
+GROUP_DELETED = "group_deleted"
+ZONE_GROUPED = "zone_grouped"
+ZONE_UNGROUPED = "zone_ungrouped"
+
+def alias_added(zone_id, alias_id, alias):
+    return ZoneConfigChange(ALIAS_ADDED, zone_id=zone_id, alias_id=alias_id, payload=alias)
+
+def alias_removed(zone_id, alias_id):
+    return ZoneConfigChange(ALIAS_REMOVED, zone_id=zone_id, alias_id=alias_id)
+
+def alias_purged(alias_name):
+    """The alias was deleted and must disappear from every zone."""
+    return ZoneConfigChange(ALIAS_PURGED, payload=alias_name)
+
+def zone_created(zone_id, zone):
+    return ZoneConfigChange(ZONE_CREATED, zone_id=zone_id, payload=zone)
+
+def zone_deleted(zone_id):
+    return ZoneConfigChange(ZONE_DELETED, zone_id=zone_id)
+
+def group_created(group_id, group_name):
+    return ZoneConfigChange(GROUP_CREATED, group_id=group_id, payload=group_name)
+
+def group_deleted(group_id):
+    return ZoneConfigChange(GROUP_DELETED, group_id=group_id)
+
+def zone_grouped(group_id, zone_id, zone):
+    return ZoneConfigChange(ZONE_GROUPED, zone_id=zone_id, group_id=group_id, payload=zone)
+
+def zone_ungrouped(group_id, zone_id, inactive_zone):
+    """`inactive_zone` is the zone dict if it is inactive (it then shows up as
+    Ungrouped), or None for an active zone, which is no longer displayed."""
+    return ZoneConfigChange(ZONE_UNGROUPED, zone_id=zone_id, group_id=group_id, payload=inactive_zone)
+
+
+class StaleViewError(Exception):
+    """The materialized view cannot absorb a change and must be rebuilt."""
+
+
+class ZoneConfigView:
+    """zone_config.json held in memory with lookup tables for patching."""
+
+    def __init__(self, config):
+        self.config = config
+        self.groups = {}        # ZoneGrpId -> group entry
+        self.zones = {}         # ZoneId -> [(group entry, zone entry), ...]
+        self.alias_zones = {}   # AliasName -> {ZoneId, ...}
+        for section in ("active", "inactive"):
+            for group_entry in config.get(section, []):
+                self.groups[group_entry["ZoneGrpId"]] = group_entry
+                for zone_entry in group_entry["ZoneMembers"]:
+                    self._index_zone(group_entry, zone_entry)
+
+    def _index_zone(self, group_entry, zone_entry):
+        zone_id = zone_entry["ZoneId"]
+        self.zones.setdefault(zone_id, []).append((group_entry, zone_entry))
+        for alias in zone_entry["AliasMembers"]:
+            self.alias_zones.setdefault(alias["AliasName"], set()).add(zone_id)
+
+    def _add_zone(self, group_entry, zone_id, zone):
+        zone_entry = _zone_member(zone_id, zone)
+        group_entry["ZoneMembers"].append(zone_entry)
+        group_entry["zoneCount"] = len(group_entry["ZoneMembers"])
+        self._index_zone(group_entry, zone_entry)
+
+    def _remove_zone(self, group_entry, zone_id):
+        locations = self.zones.get(zone_id, [])
+        for location in [loc for loc in locations if loc[0] is group_entry]:
+            locations.remove(location)
+            group_entry["ZoneMembers"].remove(location[1])
+        group_entry["zoneCount"] = len(group_entry["ZoneMembers"])
+        if not locations:
+            self.zones.pop(zone_id, None)
+        if group_entry["ZoneGrpId"] == UNGROUPED_ID and not group_entry["ZoneMembers"]:
+            self.config["inactive"].remove(group_entry)
+            del self.groups[UNGROUPED_ID]
+
+    def _ungrouped(self):
+        group_entry = self.groups.get(UNGROUPED_ID)
+        if group_entry is None:
+            group_entry = {
+                "ZoneGrpId": UNGROUPED_ID,
+                "ZoneGrpName": "Ungrouped",
+                "zoneCount": 0,
+                "ZoneMembers": []
+            }
+            self.config["inactive"].append(group_entry)
+            self.groups[UNGROUPED_ID] = group_entry
+        return group_entry
+
+    def _remove_alias(self, zone_id, match):
+        for _, zone_entry in self.zones.get(zone_id, []):
+            zone_entry["AliasMembers"] = [a for a in zone_entry["AliasMembers"] if not match(a)]
+            zone_entry["aliasCount"] = len(zone_entry["AliasMembers"])
+
+    def apply(self, change):
+        kind = change.kind
+        zone_id = int(change.zone_id) if change.zone_id is not None else None
+        group_id = int(change.group_id) if change.group_id is not None else None
+
+        if kind == ALIAS_ADDED:
+            alias_id = int(change.alias_id)
+            member = _alias_member(alias_id, change.payload)
+            for _, zone_entry in self.zones.get(zone_id, []):
+                if any(a["AliasId"] == alias_id for a in zone_entry["AliasMembers"]):
+                    continue
+                zone_entry["AliasMembers"].append(dict(member))
+                zone_entry["aliasCount"] = len(zone_entry["AliasMembers"])
+                self.alias_zones.setdefault(member["AliasName"], set()).add(zone_id)
+
+        elif kind == ALIAS_REMOVED:
+            alias_id = int(change.alias_id)
+            self._remove_alias(zone_id, lambda a: a["AliasId"] == alias_id)
+
+        elif kind == ALIAS_PURGED:
+            # Every zone, active or inactive: see remove_alias_from_all_zones.
+            alias_name = change.payload
+            for zid in self.alias_zones.pop(alias_name, set()):
+                self._remove_alias(zid, lambda a: a["AliasName"] == alias_name)
+
+        elif kind == ZONE_CREATED:
+            if zone_id not in self.zones:
+                self._add_zone(self._ungrouped(), zone_id, change.payload)
+
+        elif kind == ZONE_DELETED:
+            for group_entry, _ in list(self.zones.get(zone_id, [])):
+                self._remove_zone(group_entry, zone_id)
+
+        elif kind == GROUP_CREATED:
+            if group_id in self.groups:
+                raise StaleViewError(f"group {group_id} already materialized")
+            group_entry = {
+                "ZoneGrpId": group_id,
+                "ZoneGrpName": change.payload,
+                "zoneCount": 0,
+                "ZoneMembers": []
+            }
+            self.config["active"].append(group_entry)
+            self.groups[group_id] = group_entry
+
+        elif kind == GROUP_DELETED:
+            group_entry = self.groups.get(group_id)
+            if group_entry is None:
+                return
+            if group_entry["ZoneMembers"]:
+                # Its zones would move to Ungrouped; we lack their data here.
+                raise StaleViewError(f"group {group_id} still has zones")
+            self.config["active"].remove(group_entry)
+            del self.groups[group_id]
+
+        elif kind == ZONE_GROUPED:
+            group_entry = self.groups.get(group_id)
+            if group_entry is None or change.payload is None:
+                raise StaleViewError(f"cannot place zone {zone_id} in group {group_id}")
+            if UNGROUPED_ID in self.groups:
+                self._remove_zone(self.groups[UNGROUPED_ID], zone_id)
+            self._add_zone(group_entry, zone_id, change.payload)
+
+        elif kind == ZONE_UNGROUPED:
+            group_entry = self.groups.get(group_id)
+            if group_entry is not None:
+                self._remove_zone(group_entry, zone_id)
+            if change.payload is not None and zone_id not in self.zones:
+                self._add_zone(self._ungrouped(), zone_id, change.payload)
+
+        else:
+            raise StaleViewError(f"unknown change '{kind}'")
+
+
+_view = None
+_view_stat = None
+
+def _file_stat(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+def _load_view():
+    """Return the in-memory view, re-reading it if another writer changed the file."""
+    global _view, _view_stat
+    stat = _file_stat(ZONE_CONFIG_PATH)
+    if stat is None:
+        return None
+    if _view is None or stat != _view_stat:
+        try:
+            with open(ZONE_CONFIG_PATH, "r") as f:
+                _view = ZoneConfigView(json.load(f))
+        except (json.JSONDecodeError, KeyError):
+            return None
+        _view_stat = stat
+    return _view
+
+def _write_view(view):
+    global _view, _view_stat
+    write_json_atomic(ZONE_CONFIG_PATH, view.config, indent=2)
+    _view = view
+    _view_stat = _file_stat(ZONE_CONFIG_PATH)
+
+def apply_zone_config_changes(changes):
+    """Patch zone_config.json with a list of ZoneConfigChange events.
+
+    Falls back to a full update_zone_config() when the view does not exist
+    yet or cannot absorb one of the changes.
+    """
+    global _view
+    with _view_lock:
+        view = _load_view()
+        if view is None:
+            _rebuild_zone_config()
+            return
+        try:
+            for change in changes:
+                view.apply(change)
+        except StaleViewError:
+            # The view may be half-patched; rebuild it from the data files.
+            _view = None
+            _rebuild_zone_config()
+            return
+        view.config["last_updated"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        _write_view(view)
 
 
 def refresh_all_data():
@@ -100,21 +338,15 @@ def refresh_all_data():
     return zonegroup_data, zones_data
 
 def remove_alias_from_all_zones(alias_name):
-    
-    with open(ZONE_CONFIG_PATH, 'r') as f:
-        data = json.load(f)
-
-    updated = False
-    for zone_group in data.get("active", []):
-        for zone in zone_group.get("ZoneMembers", []):
-            original_count = len(zone.get("AliasMembers", []))
-            zone["AliasMembers"] = [a for a in zone.get("AliasMembers", []) if a.get("AliasName") != alias_name]
-            if len(zone["AliasMembers"]) != original_count:
-                updated = True
-
-    if updated:
-        with open(ZONE_CONFIG_PATH, 'w') as f:
-            json.dump(data, f, indent=4)
+    """Drop a deleted alias from every zone in zone_config.json.
+
+    This covers inactive (Ungrouped) zones as well as active ones. The
+    alias-delete cascade removes the alias from all zones in the zones
+    data, and a full update_zone_config() would drop it everywhere too, so
+    purging only active zones would leave the view disagreeing with the
+    data until the next rebuild.
+    """
+    apply_zone_config_changes([alias_purged(alias_name)])
 
 #----old code------
 # def update_zone_config():
@@ -1,77 +1,337 @@
 #zc_cdc/data_utils.py
 import json
+import os
+import threading
+import time
 from datetime import datetime
+from .filelock import lock_for
+from .id_alloc import IdAllocator
+from .index import ZoneIndex
+from .documents import write_json_atomic, diff_records
+from .snapshot_cache import SnapshotCache, freeze, thaw
+
+DATA_DIR = os.environ.get("CDC_DATA_DIR", "../CDCMgmt/data")
+
+# Logical document name -> file under DATA_DIR (the JSON layout).
+DATA_FILES = {
+    "zones": "zones_data.json",
+    "alias": "alias_data.json",
+    "zonegroup": "zonegroup_data.json",
+    "nodes": "nodes.json",
+}
+
+
+# ---- STORAGE BACKENDS ----
+class JSONFileBackend:
+    """One JSON file per document, rewritten in full on every save."""
+
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+
+    def path(self, doc):
+        return os.path.join(self.data_dir, DATA_FILES[doc])
+
+    def load(self, doc):
+        """Return the parsed document, or None if it is missing or corrupt."""
+        try:
+            with open(self.path(doc), "r") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def save(self, doc, data):
+        write_json_atomic(self.path(doc), data)
+
+    def version(self, doc):
+        """Cheap change marker for `doc`: (inode, mtime_ns, size) of its file.
+
+        Every save replaces the file, so the inode changes even when the
+        size and (coarse) mtime of a rewrite do not.
+        """
+        try:
+            st = os.stat(self.path(doc))
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class SQLiteBackend:
+    """Row-level storage in DATA_DIR/cdc_store.sqlite3 (WAL mode).
+
+    The existing data/*.json files are imported once, the first time the
+    database is opened; after that the JSON files are no longer written.
+    """
+
+    def __init__(self, data_dir):
+        from .sqlite_store import SQLiteStore
+        self.store = SQLiteStore(os.path.join(data_dir, "cdc_store.sqlite3"))
+        self.store.migrate_from(JSONFileBackend(data_dir).load)
+
+    def load(self, doc):
+        return self.store.load(doc)
+
+    def save(self, doc, data):
+        self.store.save(doc, data)
+
+    def version(self, doc):
+        return self.store.version(doc)
+
+
+class JournalBackend(JSONFileBackend):
+    """JSON snapshot files plus an append-only journal of changed rows.
+
+    Other readers of data/*.json (dashboard, REST viewers) see the snapshot,
+    which the background compactor refreshes every few seconds.
+    """
+
+    def __init__(self, data_dir):
+        from .journal_store import JournalStore
+        super().__init__(data_dir)
+        self.store = JournalStore(
+            self.path,
+            compact_records=int(os.environ.get("CDC_JOURNAL_COMPACT_RECORDS", "500")),
+            compact_interval=float(os.environ.get("CDC_JOURNAL_COMPACT_INTERVAL", "5")),
+        )
+
+    def load(self, doc):
+        return self.store.load(doc)
+
+    def save(self, doc, data):
+        self.store.save(doc, data)
+
+    def version(self, doc):
+        return self.store.version(doc)
+
+
+BACKENDS = {
+    "json": JSONFileBackend,
+    "journal": JournalBackend,
+    "sqlite": SQLiteBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    """Return the storage backend selected by CDC_STORAGE_BACKEND (default: json)."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                name = os.environ.get("CDC_STORAGE_BACKEND", "json").lower()
+                if name not in BACKENDS:
+                    raise ValueError(f"Unknown storage backend '{name}'")
+                _backend = BACKENDS[name](DATA_DIR)
+    return _backend
+
+
+# ---- DOCUMENT CACHE ----
+# Parsed documents are shared by every session in the process and
+# re-read only when the backend version (file mtime/size) changes.
+_cache = SnapshotCache()
+
+DEFAULTS = {
+    "zones": {"active_zones": {}, "inactive_zones": {}},
+    "alias": {"member_aliases": {}, "free_aliases": {}},
+    "zonegroup": {"zone_groups": {}},
+    "nodes": {"nodes": []},
+}
+
+def _load(doc):
+    """Mutable copy of `doc`, served from the cache when it is current."""
+    backend = get_backend()
+    entry = _cache.get(doc, backend.version(doc), lambda: backend.load(doc))
+    if entry.snapshot is None:
+        return json.loads(json.dumps(DEFAULTS[doc]))
+    return thaw(entry)
+
+def _snapshot(doc):
+    """Read-only cached `doc`; must not be modified by the caller."""
+    backend = get_backend()
+    entry = _cache.get(doc, backend.version(doc), lambda: backend.load(doc))
+    if entry.snapshot is None:
+        return freeze(DEFAULTS[doc])
+    return entry.snapshot
+
+def _save(doc, data, expected_revision=None, revision=None):
+    with locked(doc):
+        current = get_revision(doc)
+        if expected_revision is not None and expected_revision != current:
+            raise ConflictError(doc, expected_revision, current)
+        new_revision = max(current + 1, revision or 0)
+        indexed = _indexed_document(doc)
+        get_backend().save(doc, data)
+        _write_revision(doc, new_revision)
+        _reindex(doc, indexed, data)
+    _cache.invalidate(doc)
+    return new_revision
+
+def cache_stats():
+    """Hit/miss counters of the shared document cache."""
+    return _cache.stats()
+
+
+# ---- REVISIONS AND LOCKING ----
+# Every document carries a revision number in <file>.rev that is bumped on
+# each save, under an advisory lock on <file>.lock shared with other
+# processes (REST server, other Streamlit instances). A save given an
+# expected_revision fails with ConflictError instead of overwriting a
+# newer version. The data is written before <file>.rev, so a reader that
+# needs the two to match (load_versioned) takes the same lock; plain
+# load_*/snapshot_* reads do not.
+class ConflictError(Exception):
+    """The document was saved by someone else since it was loaded."""
+
+    def __init__(self, doc, expected, actual):
+        super().__init__(f"{doc} changed: expected revision {expected}, found {actual}")
+        self.doc = doc
+        self.expected = expected
+        self.actual = actual
+
+def _doc_path(doc):
+    return os.path.join(DATA_DIR, DATA_FILES[doc])
+
+def locked(doc):
+    """Lock for a read-modify-write of `doc`; save_* may be called inside it."""
+    return lock_for(_doc_path(doc))
+
+def get_revision(doc):
+    try:
+        with open(_doc_path(doc) + ".rev", "r") as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+def _write_revision(doc, revision):
+    write_json_atomic(_doc_path(doc) + ".rev", revision)
+
+def save_document(doc, data, expected_revision=None, revision=None):
+    """Generic save_*; `revision` lets a caller that numbers its own changes
+    (the REST server's write-behind state) store that number, if higher."""
+    return _save(doc, data, expected_revision, revision)
+
+def wait_for_revision(doc, revision, timeout=2.0):
+    """Wait until `doc` is stored at `revision` or later, e.g. after a write
+    made through the REST server, which saves it shortly afterwards.
+    Returns False if that did not happen within `timeout` seconds."""
+    deadline = time.monotonic() + timeout
+    while get_revision(doc) < revision:
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+def load_versioned(doc):
+    """Return (mutable copy of `doc`, revision), read together under the document lock."""
+    with locked(doc):
+        return _load(doc), get_revision(doc)
+
+
+# ---- LOOKUP INDEX ----
+_index = ZoneIndex()
+
+def get_index():
+    """Return the shared ZoneIndex, re-indexing documents changed by other writers."""
+    backend = get_backend()
+    _index.sync("zones", backend.version("zones"), snapshot_zones)
+    _index.sync("alias", backend.version("alias"), snapshot_alias)
+    _index.sync("zonegroup", backend.version("zonegroup"), snapshot_zonegroup)
+    return _index
+
+def _indexed_document(doc):
+    """The stored `doc` if the index reflects it, else None; call under locked(doc)."""
+    with _index.lock:
+        if doc in _index.versions and _index.versions[doc] == get_backend().version(doc):
+            return _snapshot(doc)
+    return None
+
+def _reindex(doc, indexed, data):
+    # Keep the index current after our own writes by applying just the
+    # rows that changed. If the index was behind already, get_index()
+    # re-indexes the whole document on next use.
+    if indexed is not None:
+        _index.apply_records(doc, diff_records(doc, indexed, data), get_backend().version(doc))
+
+
+# ---- ID ALLOCATION ----
+def _max_id(data, sections):
+    return max((int(k) for section in sections for k in data.get(section, {})), default=0)
+
+# Sequences are seeded from the existing data the first time they are used.
+_ID_SEEDS = {
+    "zone": lambda: _max_id(snapshot_zones(), ("active_zones", "inactive_zones")),
+    "alias": lambda: _max_id(snapshot_alias(), ("member_aliases", "free_aliases")),
+    "zone_group": lambda: _max_id(snapshot_zonegroup(), ("zone_groups",)),
+}
+
+_id_allocator = IdAllocator(os.path.join(DATA_DIR, "id_sequences.json"))
+
+def next_id(entity):
+    """Allocate a new, never reused ID for "zone", "alias" or "zone_group"."""
+    return _id_allocator.next_id(entity, _ID_SEEDS[entity])
+
+def reserve_ids(entity, count):
+    """Reserve `count` consecutive IDs for `entity` in one write; returns the first (int)."""
+    return _id_allocator.reserve(entity, count, _ID_SEEDS[entity])
+
 
 # ---- ZONE DATA ----
 def load_zones():
-    """Load zones data from JSON file."""
-    try:
-        with open("../CDCMgmt/data/zones_data.json", "r") as file:
-            return json.load(file)
-    except FileNotFoundError:
-        return {"active_zones": {}, "inactive_zones": {}}
-    except json.JSONDecodeError:
-        return {"active_zones": {}, "inactive_zones": {}}
+    """Load zones data from the storage backend."""
+    return _load("zones")
 
-def save_zones(data):
-    """Save zones data to JSON file."""
-    with open("../CDCMgmt/data/zones_data.json", "w") as file:
-        json.dump(data, file, indent=4)
+def snapshot_zones():
+    """Read-only zones data shared between sessions."""
+    return _snapshot("zones")
+
+def save_zones(data, expected_revision=None):
+    """Save zones data to the storage backend. Returns the new revision."""
+    return _save("zones", data, expected_revision)
 
 
 # ---- ALIAS DATA ----
 def load_alias():
-    """Load alias data from JSON file."""
-    try:
-        with open("../CDCMgmt/data/alias_data.json", "r") as file:
-            return json.load(file)
-    except (json.JSONDecodeError, FileNotFoundError):
-        return {"member_aliases": {}, "free_aliases": {}}
+    """Load alias data from the storage backend."""
+    return _load("alias")
 
-def save_alias(alias_data):
-    """Save alias data to JSON file."""
-    with open("../CDCMgmt/data/alias_data.json", "w") as file:
-        json.dump(alias_data, file, indent=4)
+def snapshot_alias():
+    """Read-only alias data shared between sessions."""
+    return _snapshot("alias")
+
+def save_alias(alias_data, expected_revision=None):
+    """Save alias data to the storage backend. Returns the new revision."""
+    return _save("alias", alias_data, expected_revision)
 
 
 # ---- ZONE GROUP DATA ----
 def load_zonegroup():
-    """Load zone group data from JSON file."""
-    try:
-        with open("../CDCMgmt/data/zonegroup_data.json", "r") as file:
-            return json.load(file)
-    except (json.JSONDecodeError, FileNotFoundError):
-        return {"zone_groups": {}}
+    """Load zone group data from the storage backend."""
+    return _load("zonegroup")
 
-def save_zonegroup(zonegroup_data):
-    """Save zone group data to JSON file."""
-    with open("../CDCMgmt/data/zonegroup_data.json", "w") as file:
-        json.dump(zonegroup_data, file, indent=4)
+def snapshot_zonegroup():
+    """Read-only zone group data shared between sessions."""
+    return _snapshot("zonegroup")
+
+def save_zonegroup(zonegroup_data, expected_revision=None):
+    """Save zone group data to the storage backend. Returns the new revision."""
+    return _save("zonegroup", zonegroup_data, expected_revision)
 
 
 # ---- REGISTERED NODES DATA ----
 def load_registered_nodes():
-    try:
-        with open('../CDCMgmt/data/nodes.json', 'r') as f:
-            data = json.load(f)
-        return data.get('nodes', [])
-    except FileNotFoundError:
-        return []
-    except json.JSONDecodeError:
-        return []
+    return _load("nodes").get('nodes', [])
 
-def save_registered_nodes(nodes_data):
-    with open('../CDCMgmt/data/nodes.json', 'w') as f:
-        json.dump({'nodes': nodes_data}, f, indent=4)
+def save_registered_nodes(nodes_data, expected_revision=None):
+    return _save("nodes", {'nodes': nodes_data}, expected_revision)
 
 
 def sync_zone_config_from_data_files():
     try:
-        with open("../CDCMgmt/data/zonegroup_data.json", "r") as f:
+        with open(os.path.join(DATA_DIR, DATA_FILES["zonegroup"]), "r") as f:
             zonegroups = json.load(f)
-        with open("../CDCMgmt/data/zones_data.json", "r") as f:
+        with open(os.path.join(DATA_DIR, DATA_FILES["zones"]), "r") as f:
             zones = json.load(f)
-        with open("../CDCMgmt/data/alias_data.json", "r") as f:
+        with open(os.path.join(DATA_DIR, DATA_FILES["alias"]), "r") as f:
             aliases = json.load(f)
     except Exception as e:
         print(f"Error reading data files: {e}")
@@ -114,5 +374,5 @@ def sync_zone_config_from_data_files():
         else:
             zone_config["active"].append(group_entry)
 
-    with open("../CDCMgmt/data/zone_config.json", "w") as f:
+    with open(os.path.join(DATA_DIR, "zone_config.json"), "w") as f:
         json.dump(zone_config, f, indent=2)
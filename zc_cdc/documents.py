@@ -0,0 +1,63 @@
+#zc_cdc/documents.py
+import json
+import os
+
+
+# Top-level sections of each logical document (see data_utils.DATA_FILES);
+# their rows are what the storage backends and the change diffs work on.
+#   zones     -> one row per zone in "active_zones" / "inactive_zones"
+#   alias     -> one row per alias in "member_aliases" / "free_aliases"
+#   zonegroup -> one row per group in "zone_groups"
+#   nodes     -> one row per registered node (keyed by list position)
+DOCUMENT_SECTIONS = {
+    "zones": ("active_zones", "inactive_zones"),
+    "alias": ("member_aliases", "free_aliases"),
+    "zonegroup": ("zone_groups",),
+    "nodes": ("nodes",),
+}
+
+
+def write_json_atomic(path, data, indent=4):
+    """Write `data` to a temp file, fsync it and rename it over `path`."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def diff_records(doc, old, new):
+    """Row change records that turn document `old` into `new`.
+
+    The journal backend appends them; the index and the REST server's
+    merge replay them.
+    """
+    if doc == "nodes":
+        if old != new:
+            return [{"op": "replace", "value": new}]
+        return []
+    records = []
+    for section in DOCUMENT_SECTIONS[doc]:
+        old_rows = old.get(section, {})
+        new_rows = new.get(section, {})
+        for key, value in new_rows.items():
+            if old_rows.get(key) != value:
+                records.append({"op": "put", "section": section, "key": key, "value": value})
+        for key in old_rows:
+            if key not in new_rows:
+                records.append({"op": "del", "section": section, "key": key})
+    return records
+
+
+def apply_record(data, record):
+    """Replay one record onto `data`. Records are idempotent."""
+    op = record["op"]
+    if op == "replace":
+        return record["value"]
+    section = data.setdefault(record["section"], {})
+    if op == "put":
+        section[record["key"]] = record["value"]
+    elif op == "del":
+        section.pop(record["key"], None)
+    return data
@@ -0,0 +1,78 @@
+#zc_cdc/filelock.py
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: locks only exclude threads of this process
+    fcntl = None
+
+
+class FileLock:
+    """Exclusive advisory lock on `<path>.lock`, shared by threads and processes.
+
+    Re-entrant within a thread, so a save can be nested inside a
+    read-modify-write block that already holds the lock. Wait times are
+    accumulated for monitoring.
+    """
+
+    def __init__(self, path):
+        self.path = f"{path}.lock"
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+        self.acquisitions = 0
+        self.wait_seconds = 0.0
+
+    def acquire(self):
+        start = time.perf_counter()
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_EX)
+            except OSError:
+                if self._fd is not None:
+                    os.close(self._fd)
+                    self._fd = None
+                self._thread_lock.release()
+                raise
+            self.acquisitions += 1
+            self.wait_seconds += time.perf_counter() - start
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+def lock_for(path):
+    """Return the process-wide FileLock guarding `path`."""
+    path = os.path.abspath(path)
+    with _locks_guard:
+        lock = _locks.get(path)
+        if lock is None:
+            lock = _locks[path] = FileLock(path)
+        return lock
+
+def lock_stats():
+    """{lock path: (acquisitions, total wait seconds)} for every lock used so far."""
+    with _locks_guard:
+        return {lock.path: (lock.acquisitions, lock.wait_seconds) for lock in _locks.values()}
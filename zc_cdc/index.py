@@ -0,0 +1,196 @@
+#zc_cdc/index.py
+import threading
+
+
+class ZoneIndex:
+    """Reverse lookups over the zone, alias and zone group documents.
+
+    Each document is indexed as a whole with index_zones / index_aliases /
+    index_zonegroups. A writer that knows what changed updates it in place
+    instead, with apply_records() or the add_* / remove_* methods. IDs are
+    kept as strings, the same as the keys in the data files.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.versions = {}
+
+        self.zone_ids = {}          # zone name -> zone id
+        self.zone_names = {}        # zone id -> zone name
+        self.zone_aliases = {}      # zone id -> {alias name, ...}
+        self.alias_zones = {}       # alias name -> {zone id, ...}
+
+        self.alias_ids = {}         # alias name -> alias id
+        self.alias_names = {}       # alias id -> alias name
+        self.alias_keys = {}        # alias id -> (nqn, ip), to unindex it
+        self.nqn_alias = {}         # nqn -> alias id
+        self.ip_alias = {}          # ip -> alias id
+
+        self.group_ids = {}         # group name -> group id
+        self.group_names = {}       # group id -> group name
+        self.zone_group = {}        # zone id -> group id
+
+    # ---- SYNC ----
+    def sync(self, doc, version, load):
+        """Re-index `doc` from load() if its storage version changed."""
+        with self.lock:
+            if version is not None and self.versions.get(doc) == version:
+                return
+            indexer = {
+                "zones": self.index_zones,
+                "alias": self.index_aliases,
+                "zonegroup": self.index_zonegroups,
+            }[doc]
+            indexer(load())
+            self.versions[doc] = version
+
+    def apply_records(self, doc, records, version):
+        """Update `doc` in place from its journal records (see
+        documents.diff_records) and mark it as indexed at `version`."""
+        remove, add = {
+            "zones": (self.remove_zone, self.add_zone),
+            "alias": (self.remove_alias, self.add_alias),
+            "zonegroup": (self.remove_group, self.add_group),
+        }[doc]
+        with self.lock:
+            # A put replaces the object, and an object moved between
+            # sections comes as a put in one and a del in the other, so
+            # every key is removed before any is added back.
+            for record in records:
+                remove(record["key"])
+            for record in records:
+                if record["op"] == "put":
+                    add(record["key"], record["value"])
+            self.versions[doc] = version
+
+    # ---- ZONES ----
+    def index_zones(self, zones_data):
+        with self.lock:
+            self.zone_ids.clear()
+            self.zone_names.clear()
+            self.zone_aliases.clear()
+            self.alias_zones.clear()
+            for section in ("active_zones", "inactive_zones"):
+                for zone_id, zone in zones_data.get(section, {}).items():
+                    self.add_zone(zone_id, zone)
+
+    def add_zone(self, zone_id, zone):
+        with self.lock:
+            zone_id = str(zone_id)
+            self.zone_ids[zone["name"]] = zone_id
+            self.zone_names[zone_id] = zone["name"]
+            for alias in zone.get("aliases", {}).values():
+                self.add_zone_alias(zone_id, alias["name"])
+
+    def remove_zone(self, zone_id):
+        with self.lock:
+            zone_id = str(zone_id)
+            name = self.zone_names.pop(zone_id, None)
+            if name is not None and self.zone_ids.get(name) == zone_id:
+                del self.zone_ids[name]
+            for alias_name in self.zone_aliases.pop(zone_id, set()):
+                zones = self.alias_zones.get(alias_name)
+                if zones is not None:
+                    zones.discard(zone_id)
+                    if not zones:
+                        del self.alias_zones[alias_name]
+
+    def add_zone_alias(self, zone_id, alias_name):
+        with self.lock:
+            self.zone_aliases.setdefault(str(zone_id), set()).add(alias_name)
+            self.alias_zones.setdefault(alias_name, set()).add(str(zone_id))
+
+    def remove_zone_alias(self, zone_id, alias_name):
+        with self.lock:
+            self.zone_aliases.get(str(zone_id), set()).discard(alias_name)
+            zones = self.alias_zones.get(alias_name)
+            if zones is not None:
+                zones.discard(str(zone_id))
+                if not zones:
+                    del self.alias_zones[alias_name]
+
+    # ---- ALIASES ----
+    def index_aliases(self, alias_data):
+        with self.lock:
+            self.alias_ids.clear()
+            self.alias_names.clear()
+            self.alias_keys.clear()
+            self.nqn_alias.clear()
+            self.ip_alias.clear()
+            for section in ("member_aliases", "free_aliases"):
+                for alias_id, alias in alias_data.get(section, {}).items():
+                    self.add_alias(alias_id, alias)
+
+    def add_alias(self, alias_id, alias):
+        with self.lock:
+            alias_id = str(alias_id)
+            self.alias_ids[alias["name"]] = alias_id
+            self.alias_names[alias_id] = alias["name"]
+            nqn, ip = alias.get("nqn"), alias.get("ip")
+            self.alias_keys[alias_id] = (nqn, ip)
+            if nqn:
+                self.nqn_alias[nqn] = alias_id
+            if ip:
+                self.ip_alias[ip] = alias_id
+
+    def remove_alias(self, alias_id, alias=None):
+        with self.lock:
+            alias_id = str(alias_id)
+            nqn, ip = self.alias_keys.pop(alias_id, (None, None))
+            for table, value in ((self.alias_ids, self.alias_names.pop(alias_id, None)),
+                                 (self.nqn_alias, nqn),
+                                 (self.ip_alias, ip)):
+                if value and table.get(value) == alias_id:
+                    del table[value]
+
+    # ---- ZONE GROUPS ----
+    def index_zonegroups(self, zonegroup_data):
+        with self.lock:
+            self.group_ids.clear()
+            self.group_names.clear()
+            self.zone_group.clear()
+            for group_id, group in zonegroup_data.get("zone_groups", {}).items():
+                self.add_group(group_id, group)
+
+    def add_group(self, group_id, group):
+        with self.lock:
+            group_id = str(group_id)
+            self.group_ids[group["name"]] = group_id
+            self.group_names[group_id] = group["name"]
+            for zone_id in group.get("zones", []):
+                self.zone_group[str(zone_id)] = group_id
+
+    def remove_group(self, group_id):
+        with self.lock:
+            group_id = str(group_id)
+            name = self.group_names.pop(group_id, None)
+            if name is not None and self.group_ids.get(name) == group_id:
+                del self.group_ids[name]
+            for zone_id in [z for z, g in self.zone_group.items() if g == group_id]:
+                del self.zone_group[zone_id]
+
+    # ---- LOOKUPS ----
+    def zone_id(self, zone_name):
+        return self.zone_ids.get(zone_name)
+
+    def alias_id(self, alias_name):
+        return self.alias_ids.get(alias_name)
+
+    def group_id(self, group_name):
+        return self.group_ids.get(group_name)
+
+    def zones_with_alias(self, alias_name):
+        return set(self.alias_zones.get(alias_name, ()))
+
+    def group_of_zone(self, zone_id):
+        return self.zone_group.get(str(zone_id))
+
+    def group_name_of_zone(self, zone_id):
+        group_id = self.zone_group.get(str(zone_id))
+        return self.group_names.get(group_id) if group_id is not None else None
+
+    def alias_by_nqn(self, nqn):
+        return self.nqn_alias.get(nqn)
+
+    def alias_by_ip(self, ip):
+        return self.ip_alias.get(ip)
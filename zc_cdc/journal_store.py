@@ -0,0 +1,181 @@
+#zc_cdc/journal_store.py
+import json
+import os
+import threading
+
+from .documents import DOCUMENT_SECTIONS, write_json_atomic, diff_records, apply_record
+from .filelock import lock_for
+
+
+class JournalStore:
+    """JSON snapshot files plus an append-only journal per document.
+
+    save() appends only the rows that changed to <file>.journal; readers
+    replay the journal over the snapshot. Appends from concurrent writers
+    share a single fsync (group commit). A background compactor folds the
+    journal into a fresh snapshot every `compact_interval` seconds, or as
+    soon as it grows past `compact_records`; its thread is started by the
+    first journal record seen, so a store that is never written to (or
+    only holds snapshots) runs no thread.
+    Records are idempotent, so a crash between writing the new snapshot and
+    truncating the journal replays to the same state.
+    """
+
+    def __init__(self, path_for, compact_records=500, compact_interval=30.0):
+        self.path_for = path_for
+        self.compact_records = compact_records
+        self.compact_interval = compact_interval
+
+        self._locks = {doc: threading.Lock() for doc in DOCUMENT_SECTIONS}
+        self._sync_lock = threading.Lock()
+        self._state = {}            # doc -> (version, data)
+        self._pending = {}          # doc -> records appended since compaction
+        self._written = 0           # append counter
+        self._synced = 0            # last append counter covered by fsync
+        self._dirty_files = set()
+
+        self._wake = threading.Event()
+        self._compactor = None
+        self._compactor_lock = threading.Lock()
+
+    def _start_compactor(self):
+        with self._compactor_lock:
+            if self._compactor is None:
+                self._compactor = threading.Thread(target=self._compact_loop, name="journal-compactor",
+                                                   daemon=True)
+                self._compactor.start()
+
+    def journal_path(self, doc):
+        return self.path_for(doc) + ".journal"
+
+    # ---- READ ----
+    def version(self, doc):
+        marks = []
+        for path in (self.path_for(doc), self.journal_path(doc)):
+            try:
+                st = os.stat(path)
+                # The snapshot is replaced on compaction: the inode marks it.
+                marks.append((st.st_ino, st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                marks.append(None)
+        if marks == [None, None]:
+            return None
+        return tuple(marks)
+
+    def load(self, doc):
+        with self._locks[doc]:
+            data = self._current(doc)
+        return None if data is None else json.loads(json.dumps(data))
+
+    def _current(self, doc):
+        version = self.version(doc)
+        cached = self._state.get(doc)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        data = self._replay(doc)
+        self._state[doc] = (version, data)
+        return data
+
+    def _replay(self, doc):
+        try:
+            with open(self.path_for(doc), "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = None
+        except json.JSONDecodeError:
+            data = None
+
+        count = 0
+        try:
+            with open(self.journal_path(doc), "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        break   # torn tail of an interrupted append
+                    if data is None:
+                        data = {} if doc != "nodes" else {"nodes": []}
+                    data = apply_record(data, record)
+                    count += 1
+        except FileNotFoundError:
+            pass
+        self._pending[doc] = count
+        if count:
+            self._start_compactor()
+        return data
+
+    # ---- WRITE ----
+    def save(self, doc, data):
+        with self._locks[doc]:
+            current = self._current(doc)
+            if current is None:
+                # First write of this document: start from a snapshot.
+                write_json_atomic(self.path_for(doc), data)
+                self._state[doc] = (self.version(doc), json.loads(json.dumps(data)))
+                return
+            records = diff_records(doc, current, data)
+            if not records:
+                return
+            payload = "".join(json.dumps(r) + "\n" for r in records)
+            with open(self.journal_path(doc), "a") as f:
+                f.write(payload)
+                f.flush()
+                with self._sync_lock:
+                    self._written += 1
+                    ticket = self._written
+                    self._dirty_files.add(self.journal_path(doc))
+            # Re-parse so the cached state shares nothing with the caller's dict.
+            for line in payload.splitlines():
+                current = apply_record(current, json.loads(line))
+            self._state[doc] = (self.version(doc), current)
+            self._pending[doc] = self._pending.get(doc, 0) + len(records)
+            self._start_compactor()
+            if self._pending[doc] >= self.compact_records:
+                self._wake.set()
+        self._sync(ticket)
+
+    def _sync(self, ticket):
+        # Group commit: whoever holds the lock fsyncs every append made so
+        # far, so writers that queued behind it return without their own fsync.
+        with self._sync_lock:
+            if self._synced >= ticket:
+                return
+            target = self._written
+            paths = list(self._dirty_files)
+            self._dirty_files.clear()
+            for path in paths:
+                try:
+                    fd = os.open(path, os.O_RDONLY)
+                except FileNotFoundError:
+                    continue
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            self._synced = target
+
+    # ---- COMPACTION ----
+    def compact(self, doc):
+        """Fold the journal of `doc` into a new snapshot and truncate it."""
+        # The file lock keeps other processes from appending meanwhile.
+        with lock_for(self.path_for(doc)), self._locks[doc]:
+            data = self._current(doc)
+            if data is None or not os.path.exists(self.journal_path(doc)):
+                return
+            write_json_atomic(self.path_for(doc), data)
+            os.remove(self.journal_path(doc))
+            self._pending[doc] = 0
+            self._state[doc] = (self.version(doc), data)
+
+    def _compact_loop(self):
+        # Compact right away once a journal is long, otherwise every
+        # `compact_interval` seconds so the snapshot files never lag far behind.
+        while True:
+            self._wake.wait(self.compact_interval)
+            self._wake.clear()
+            for doc in DOCUMENT_SECTIONS:
+                if self._pending.get(doc, 0) > 0:
+                    try:
+                        self.compact(doc)
+                    except OSError as e:
+                        print(f"Journal compaction of {doc} failed: {e}")
@@ -0,0 +1,95 @@
+#zc_cdc/snapshot_cache.py
+import pickle
+import threading
+from collections import namedtuple
+
+
+class FrozenDict(dict):
+    """A dict that refuses mutation. Still a dict, so json.dump accepts it."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("cached snapshots are read-only; use load_*() for a mutable copy")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def freeze(obj):
+    """Recursively convert parsed JSON into FrozenDict / tuple."""
+    if isinstance(obj, dict):
+        return FrozenDict((k, freeze(v)) for k, v in obj.items())
+    if isinstance(obj, list):
+        return tuple(freeze(v) for v in obj)
+    return obj
+
+
+CacheEntry = namedtuple("CacheEntry", ["key", "snapshot", "blob"])
+
+
+class SnapshotCache:
+    """Thread-safe, process-wide cache of parsed documents.
+
+    Entries are validated against a key supplied by the caller (for files,
+    (st_mtime_ns, st_size)), so a change made by any writer is picked up on
+    the next read. Each entry holds an immutable snapshot shared by every
+    session, plus a pickled copy used to hand out mutable copies quickly.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, name, key, load):
+        """Return the CacheEntry for `name`, calling load() if `key` changed."""
+        if key is None:
+            # Nothing on disk to validate against; don't cache.
+            data = load()
+            with self._lock:
+                self.misses += 1
+            return CacheEntry(None, freeze(data), pickle.dumps(data, pickle.HIGHEST_PROTOCOL))
+
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry.key == key:
+                self.hits += 1
+                return entry
+
+        data = load()
+        entry = CacheEntry(key, freeze(data), pickle.dumps(data, pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            self.misses += 1
+            self._entries[name] = entry
+        return entry
+
+    def invalidate(self, name=None):
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+def thaw(entry):
+    """Return a fresh mutable copy of a cached document."""
+    return pickle.loads(entry.blob)
@@ -0,0 +1,157 @@
+#zc_cdc/sqlite_store.py
+import json
+import sqlite3
+import threading
+
+from .documents import DOCUMENT_SECTIONS
+
+
+# Each JSON document is split into rows (see documents.DOCUMENT_SECTIONS)
+# so that a save only touches the zones, aliases, groups or nodes that
+# actually changed.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    doc      TEXT NOT NULL,
+    section  TEXT NOT NULL,
+    key      TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    body     TEXT NOT NULL,
+    PRIMARY KEY (doc, section, key)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    name  TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class SQLiteStore:
+    """Row-level storage for the zone documents in a WAL-mode SQLite file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # sqlite3 connections may not be shared between threads, and every
+        # Streamlit session runs in its own thread.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ---- DOCUMENT API ----
+    def load(self, doc):
+        """Rebuild a document from its rows. Returns None if it was never stored."""
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT section, key, body FROM rows WHERE doc = ? ORDER BY position",
+            (doc,),
+        ).fetchall()
+        if not rows and not self._has_meta(f"doc:{doc}"):
+            return None
+
+        if doc == "nodes":
+            return {"nodes": [json.loads(body) for _, _, body in rows]}
+
+        data = {section: {} for section in DOCUMENT_SECTIONS[doc]}
+        for section, key, body in rows:
+            data.setdefault(section, {})[key] = json.loads(body)
+        return data
+
+    def save(self, doc, data):
+        """Write only the rows of `doc` that differ from what is stored."""
+        wanted = dict(self._iter_rows(doc, data))
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            current = {
+                (section, key): (position, body)
+                for section, key, position, body in conn.execute(
+                    "SELECT section, key, position, body FROM rows WHERE doc = ?",
+                    (doc,),
+                )
+            }
+            next_position = max((p for p, _ in current.values()), default=0) + 1
+
+            upserts = []
+            for row_key, body in wanted.items():
+                existing = current.get(row_key)
+                if doc == "nodes":
+                    # Node order is the list order, so the key is the position.
+                    position = int(row_key[1])
+                elif existing is not None:
+                    position = existing[0]
+                else:
+                    position = next_position
+                    next_position += 1
+                if existing != (position, body):
+                    upserts.append((doc, row_key[0], row_key[1], position, body))
+
+            deletes = [(doc, s, k) for (s, k) in current if (s, k) not in wanted]
+
+            if upserts:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO rows (doc, section, key, position, body) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    upserts,
+                )
+            if deletes:
+                conn.executemany(
+                    "DELETE FROM rows WHERE doc = ? AND section = ? AND key = ?",
+                    deletes,
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)",
+                (f"doc:{doc}", "1"),
+            )
+            self._bump_version(conn, doc)
+
+    def version(self, doc):
+        """Counter bumped on every write to `doc`, or None if never written."""
+        row = self._connect().execute(
+            "SELECT value FROM meta WHERE name = ?", (f"version:{doc}",)
+        ).fetchone()
+        return int(row[0]) if row else None
+
+    def _bump_version(self, conn, doc):
+        conn.execute(
+            "INSERT INTO meta (name, value) VALUES (?, '1') "
+            "ON CONFLICT (name) DO UPDATE SET value = CAST(value AS INTEGER) + 1",
+            (f"version:{doc}",),
+        )
+
+    # ---- MIGRATION ----
+    def migrate_from(self, load_document):
+        """One-shot import of every document returned by `load_document(doc)`."""
+        if self._has_meta("migrated"):
+            return False
+        for doc in DOCUMENT_SECTIONS:
+            data = load_document(doc)
+            if data is not None:
+                self.save(doc, data)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES ('migrated', '1')"
+            )
+        return True
+
+    def _has_meta(self, name):
+        row = self._connect().execute(
+            "SELECT 1 FROM meta WHERE name = ?", (name,)
+        ).fetchone()
+        return row is not None
+
+    def _iter_rows(self, doc, data):
+        if doc == "nodes":
+            for position, node in enumerate(data.get("nodes", []), start=1):
+                yield ("nodes", str(position)), json.dumps(node, sort_keys=True)
+            return
+        for section in DOCUMENT_SECTIONS[doc]:
+            for key, value in data.get(section, {}).items():
+                yield (section, str(key)), json.dumps(value, sort_keys=True)
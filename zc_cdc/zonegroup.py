@@ -3,9 +3,10 @@ import streamlit as st
 import json
 import re
 import time
-import requests
 import pandas as pd
-from .data_utils import load_zones, load_zonegroup, save_zonegroup
+from .data_utils import (snapshot_zones, load_zonegroup, save_zonegroup, get_index, next_id,
+                         load_versioned, locked, ConflictError)
+from .activate_zone import reload_after_conflict, rest_mutation
 
 
 # def load_zonegroup():
@@ -20,29 +21,27 @@ from .data_utils import load_zones, load_zonegroup, save_zonegroup
 
 data = load_zonegroup()
  
-def get_next_group_id(data):
-    if not data["zone_groups"]:
-        return "1"
-    return str(max(map(int, data["zone_groups"].keys())) + 1)
+def get_next_group_id(data=None):
+    return next_id("zone_group")
 
 def create_zone_group(name):
-    data = load_zonegroup()
     if not re.match(r'^[a-zA-Z0-9_-]+$', name):
         raise ValueError("Group name must be alphanumeric with _ or -")
-    for g in data["zone_groups"].values():
-        if g["name"] == name:
+    with locked("zonegroup"):
+        data = load_zonegroup()
+        if get_index().group_id(name) is not None:
             raise ValueError(f"Group '{name}' already exists")
-    new_id = get_next_group_id(data)
-    
-    # Add new group to data
-    data["zone_groups"][new_id] = {
-        "name": name,
-        "zones": [],  # Stores selected zones
-        "active": False
-    }
-    save_zonegroup(data)
-    from .config_manager import update_zone_config  # 👈 local import here
-    update_zone_config()
+        new_id = get_next_group_id(data)
+
+        # Add new group to data
+        data["zone_groups"][new_id] = {
+            "name": name,
+            "zones": [],  # Stores selected zones
+            "active": False
+        }
+        save_zonegroup(data)
+    from .config_manager import apply_zone_config_changes, group_created  # 👈 local import here
+    apply_zone_config_changes([group_created(new_id, name)])
     return name
 
 
@@ -60,7 +59,7 @@ def CreateZoneGroup(callback_logging):
                     st.warning("Please enter a group name.")
                     return
                 else:
-                    resp = requests.post(f"http://localhost:5001/cdc/api/v1/zgrp/{group_name}")
+                    resp = rest_mutation("POST", f"zgrp/{group_name}")
                     if resp.status_code != 201:
                         raise ValueError(resp.json().get("error", "Failed to create zone group"))
                     callback_logging(f"Zone Group '{group_name}' created")
@@ -75,8 +74,8 @@ st.divider()
 
 def ZoneGroupManager(callback_logging):
     st.write("### Zone Group Management")
-    data = load_zonegroup()
-    zone_data = load_zones()
+    data, group_rev = load_versioned("zonegroup")
+    zone_data = snapshot_zones()
 
     if not data["zone_groups"]:
         st.info("No zone groups created yet")
@@ -126,7 +125,12 @@ def ZoneGroupManager(callback_logging):
                         st.info(f"Current zones in group: {len(data['zone_groups'][selected_group_id]['zones'])}")
                     else:
                         del data["zone_groups"][selected_group_id]
-                        save_zonegroup(data)
+                        try:
+                            save_zonegroup(data, expected_revision=group_rev)
+                        except ConflictError as e:
+                            reload_after_conflict(e)
+                        from .config_manager import apply_zone_config_changes, group_deleted
+                        apply_zone_config_changes([group_deleted(selected_group_id)])
 
                         callback_logging(f"Deleted zone group '{group_name}'")
                         st.success(f"Zone Group '{group_name}' deleted successfully!")
@@ -163,18 +167,24 @@ def ZoneGroupManager(callback_logging):
                 if st.button("➖ Remove Selected", key=f"remove_{selected_group_id}"):
                     zones_to_remove = edited_current[edited_current["Select"]]["ID"].tolist()
                     group["zones"] = [z for z in current_zones if z not in zones_to_remove]
-                    save_zonegroup(data)
-                    from .config_manager import update_zone_config
-                    update_zone_config()
+                    try:
+                        save_zonegroup(data, expected_revision=group_rev)
+                    except ConflictError as e:
+                        reload_after_conflict(e)
+                    from .config_manager import apply_zone_config_changes, zone_ungrouped
+                    apply_zone_config_changes([
+                        zone_ungrouped(selected_group_id, zone_id, zone_data["inactive_zones"].get(zone_id))
+                        for zone_id in zones_to_remove
+                    ])
                     callback_logging(f"Removed zones from {group['name']}")
                     st.rerun()
 
         with cols2:
             st.write("#### Available Zones")
-            grouped_zones = {z for g in data["zone_groups"].values() for z in g["zones"]}
+            index = get_index()
             available_zones = {
                 k: v for k, v in {**zone_data["active_zones"], **zone_data["inactive_zones"]}.items()
-                if k not in grouped_zones
+                if index.group_of_zone(k) is None
             }
             if not available_zones:
                 st.info("No available zones to add")
@@ -201,9 +211,15 @@ def ZoneGroupManager(callback_logging):
                 if st.button("➕ Add Selected", key=f"add_{selected_group_id}"):
                     zones_to_add = edited_available[edited_available["Select"]]["ID"].tolist()
                     data["zone_groups"][selected_group_id]["zones"].extend(zones_to_add)
-                    save_zonegroup(data)
-                    from .config_manager import update_zone_config
-                    update_zone_config()
+                    try:
+                        save_zonegroup(data, expected_revision=group_rev)
+                    except ConflictError as e:
+                        reload_after_conflict(e)
+                    from .config_manager import apply_zone_config_changes, zone_grouped
+                    apply_zone_config_changes([
+                        zone_grouped(selected_group_id, zone_id, available_zones[zone_id])
+                        for zone_id in zones_to_add
+                    ])
                     callback_logging(f"Added zones to {group['name']}")
                     st.rerun()
 